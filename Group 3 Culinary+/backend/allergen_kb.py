@@ -0,0 +1,297 @@
+# backend/allergen_kb.py
+"""
+Compiled allergen knowledge base.
+
+The allergen CSV is compiled once into a single binary file holding the
+ingredient and allergen string tables plus a word-level trie used to match
+ingredient phrases in a transcript. Workers mmap the file at startup instead
+of re-reading the CSV with pandas.
+
+Build it ahead of time with:
+    python allergen_kb.py <allergen_list.csv> [allergen_kb.bin]
+"""
+import os
+import re
+import sys
+import mmap
+import time
+import struct
+import hashlib
+import threading
+from array import array
+from bisect import bisect_left
+
+MAGIC = b"ALKB"
+FORMAT_VERSION = 2
+
+# Allergen categories, one bit each, in the order of the app's allergy options.
+# Free-text "Possible Allergens" values are mapped onto these by keyword, user
+# allergy names by exact category name, so screening is a bitwise AND.
+ALLERGEN_CATEGORIES = (
+    ("Dairy", r"dairy|lactose|milk"),
+    ("Eggs", r"eggs?"),
+    ("Fish", r"fish"),
+    ("Shellfish", r"shellfish|crustaceans?|molluscs?"),
+    ("Tree nuts", r"tree ?nuts?"),
+    ("Peanuts", r"peanuts?"),
+    ("Wheat", r"wheat"),
+    ("Soy", r"soy|soya|soybeans?"),
+    ("Gluten", r"gluten|wheat|barley|rye"),
+    ("Sesame", r"sesame"),
+    ("Corn", r"corn|maize"),
+    ("Spice", r"spices?"),
+    ("Alcohol", r"alcohol"),
+)
+_CATEGORY_PATTERNS = [re.compile(rf"\b(?:{pattern})\b", re.IGNORECASE)
+                      for _, pattern in ALLERGEN_CATEGORIES]
+_CATEGORY_BITS = {name.lower(): bit for bit, (name, _) in enumerate(ALLERGEN_CATEGORIES)}
+
+def allergen_mask(text):
+    """Bitmask of the allergen categories mentioned in a string"""
+    mask = 0
+    for bit, pattern in enumerate(_CATEGORY_PATTERNS):
+        if pattern.search(text):
+            mask |= 1 << bit
+    return mask
+
+def profile_mask(allergies):
+    """
+    Bitmask for a user's list of allergies (e.g. ["Dairy", "Tree nuts"]).
+
+    Names must be category names: the ingredient keywords would let "Wheat" also
+    set Gluten. Raises ValueError for anything else rather than returning a mask
+    that silently screens nothing.
+    """
+    if not isinstance(allergies, list) or not all(isinstance(a, str) for a in allergies):
+        raise ValueError("allergies must be a list of strings")
+    mask = 0
+    for allergy in allergies:
+        bit = _CATEGORY_BITS.get(" ".join(allergy.lower().split()))
+        if bit is None:
+            raise ValueError(f"Unknown allergy: {allergy!r}")
+        mask |= 1 << bit
+    return mask
+
+def mask_names(mask):
+    """Category names for the bits set in a mask"""
+    return [name for bit, (name, _) in enumerate(ALLERGEN_CATEGORIES) if mask & (1 << bit)]
+
+# Sections in file order, all u32 arrays except the *_blob UTF-8 string data
+SECTIONS = (
+    "word_offsets", "word_blob",             # sorted vocabulary of ingredient words
+    "edge_start", "edge_word", "edge_child",  # trie edges, grouped per node and sorted by word ID
+    "node_value",                             # ingredient index ending at a node, or NO_VALUE
+    "ing_offsets", "ing_blob",
+    "ing_allergen",                           # ingredient index -> allergen index
+    "ing_mask",                               # ingredient index -> allergen category bitmask
+    "allergen_offsets", "allergen_blob",
+)
+# magic, version, csv size, csv mtime_ns, csv sha256, max phrase words, then (offset, length) per section
+HEADER = struct.Struct("<4sIQQ32sI" + "QQ" * len(SECTIONS))
+NO_VALUE = 0xFFFFFFFF
+
+def read_table(csv_path):
+    """Read and normalize the allergen CSV the same way model.py always has"""
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    df["Ingredient"] = df["Ingredient"].str.lower().str.strip()
+    df["Possible Allergens"] = df["Possible Allergens"].fillna("None").str.strip()
+    df = df.dropna(subset=["Ingredient"])
+    # Later rows win, as with dict(zip(...))
+    return dict(zip(df["Ingredient"], df["Possible Allergens"]))
+
+def _string_table(strings):
+    offsets = array("I", [0])
+    blob = bytearray()
+    for s in strings:
+        blob += s.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+def build(csv_path, kb_path):
+    """Compile the CSV into a KB file, written atomically"""
+    with open(csv_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).digest()
+    stat = os.stat(csv_path)
+    table = read_table(csv_path)
+
+    # Only single-spaced phrases can ever match a whitespace-split transcript
+    ingredients = sorted(ing for ing in table if ing and " ".join(ing.split()) == ing)
+    allergens = sorted(set(table[ing] for ing in ingredients))
+    allergen_index = {a: i for i, a in enumerate(allergens)}
+    words = sorted(set(w for ing in ingredients for w in ing.split()))
+    word_index = {w: i for i, w in enumerate(words)}
+
+    # Word-level trie: node 0 is the root
+    children = [{}]
+    values = [NO_VALUE]
+    for i, ing in enumerate(ingredients):
+        node = 0
+        for word in ing.split():
+            wid = word_index[word]
+            if wid not in children[node]:
+                children[node][wid] = len(children)
+                children.append({})
+                values.append(NO_VALUE)
+            node = children[node][wid]
+        values[node] = i
+
+    edge_start = array("I", [0])
+    edge_word = array("I")
+    edge_child = array("I")
+    for edges in children:
+        for wid in sorted(edges):
+            edge_word.append(wid)
+            edge_child.append(edges[wid])
+        edge_start.append(len(edge_word))
+
+    word_offsets, word_blob = _string_table(words)
+    ing_offsets, ing_blob = _string_table(ingredients)
+    allergen_offsets, allergen_blob = _string_table(allergens)
+    sections = {
+        "word_offsets": word_offsets, "word_blob": word_blob,
+        "edge_start": edge_start, "edge_word": edge_word, "edge_child": edge_child,
+        "node_value": array("I", values),
+        "ing_offsets": ing_offsets, "ing_blob": ing_blob,
+        "ing_allergen": array("I", [allergen_index[table[ing]] for ing in ingredients]),
+        "ing_mask": array("I", [allergen_mask(table[ing]) for ing in ingredients]),
+        "allergen_offsets": allergen_offsets, "allergen_blob": allergen_blob,
+    }
+
+    body = bytearray()
+    layout = []
+    for name in SECTIONS:
+        data = sections[name]
+        data = data.tobytes() if isinstance(data, array) else data
+        body += b"\0" * (-len(body) % 4)  # keep u32 arrays aligned
+        layout += [HEADER.size + len(body), len(data)]
+        body += data
+
+    max_words = max((len(ing.split()) for ing in ingredients), default=1)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, stat.st_size, stat.st_mtime_ns,
+                         digest, max_words, *layout)
+
+    tmp_path = f"{kb_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(body)
+    os.replace(tmp_path, kb_path)
+    return kb_path
+
+class AllergenKB:
+    """Read-only, mmap-backed view of a compiled KB file"""
+
+    def __init__(self, kb_path):
+        with open(kb_path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        fields = HEADER.unpack_from(self._mm, 0)
+        magic, version, self.csv_size, self.csv_mtime_ns, digest, self.max_phrase_words = fields[:6]
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{kb_path} is not a version {FORMAT_VERSION} allergen KB")
+        self.version = digest.hex()[:12]
+
+        view = memoryview(self._mm)
+        layout = fields[6:]
+        for i, name in enumerate(SECTIONS):
+            offset, length = layout[2 * i], layout[2 * i + 1]
+            data = view[offset:offset + length]
+            setattr(self, name, data if name.endswith("_blob") else data.cast("I"))
+
+    def __len__(self):
+        return len(self.ing_offsets) - 1
+
+    def _word_id(self, word):
+        """Binary search the sorted vocabulary, None if the word is unknown"""
+        key = word.encode("utf-8")
+        lo, hi = 0, len(self.word_offsets) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if bytes(self.word_blob[self.word_offsets[mid]:self.word_offsets[mid + 1]]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.word_offsets) - 1 and \
+                bytes(self.word_blob[self.word_offsets[lo]:self.word_offsets[lo + 1]]) == key:
+            return lo
+        return None
+
+    def _child(self, node, wid):
+        lo, hi = self.edge_start[node], self.edge_start[node + 1]
+        i = bisect_left(self.edge_word, wid, lo, hi)
+        if i < hi and self.edge_word[i] == wid:
+            return self.edge_child[i]
+        return None
+
+    def ingredient(self, i):
+        return bytes(self.ing_blob[self.ing_offsets[i]:self.ing_offsets[i + 1]]).decode("utf-8")
+
+    def allergen(self, i):
+        a = self.ing_allergen[i]
+        return bytes(self.allergen_blob[self.allergen_offsets[a]:self.allergen_offsets[a + 1]]).decode("utf-8")
+
+    def mask(self, i):
+        """Allergen category bitmask of an ingredient"""
+        return self.ing_mask[i]
+
+    def match(self, words):
+        """Indices of every ingredient phrase occurring in a list of words, in order of first occurrence"""
+        word_ids = [self._word_id(w) for w in words]
+        found = {}
+        for i in range(len(word_ids)):
+            node = 0
+            for wid in word_ids[i:i + self.max_phrase_words]:
+                node = self._child(node, wid) if wid is not None else None
+                if node is None:
+                    break
+                value = self.node_value[node]
+                if value != NO_VALUE:
+                    found.setdefault(value, None)
+        return list(found)
+
+def is_current(kb_path, csv_path):
+    """True if the KB exists, has this format version and was built from the CSV as it is now"""
+    try:
+        with open(kb_path, "rb") as f:
+            fields = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return False
+    if fields[0] != MAGIC or fields[1] != FORMAT_VERSION:
+        return False
+    if not os.path.exists(csv_path):
+        return True  # prebuilt artifact shipped without its source
+    stat = os.stat(csv_path)
+    return (fields[2], fields[3]) == (stat.st_size, stat.st_mtime_ns)
+
+def load_or_build(csv_path, kb_path):
+    """Load the KB, compiling it first if it is missing or out of date"""
+    if not is_current(kb_path, csv_path):
+        print(f"Compiling allergen KB {kb_path} from {csv_path}")
+        build(csv_path, kb_path)
+    return AllergenKB(kb_path)
+
+def watch(csv_path, kb_path, on_reload, interval=5):
+    """Rebuild and hand a fresh KB to on_reload whenever the CSV changes"""
+    def _run():
+        while True:
+            time.sleep(interval)
+            try:
+                if os.path.exists(csv_path) and not is_current(kb_path, csv_path):
+                    on_reload(load_or_build(csv_path, kb_path))
+                    print(f"Reloaded allergen KB from {csv_path}")
+            except Exception as e:
+                print(f"Allergen KB reload failed: {str(e)}")
+
+    thread = threading.Thread(target=_run, daemon=True)
+    thread.start()
+    return thread
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python allergen_kb.py <allergen_list.csv> [allergen_kb.bin]")
+        sys.exit(1)
+    out_path = sys.argv[2] if len(sys.argv) > 2 else "allergen_kb.bin"
+    build(sys.argv[1], out_path)
+    kb = AllergenKB(out_path)
+    print(f"Wrote {out_path}: {len(kb)} ingredients, version {kb.version}")
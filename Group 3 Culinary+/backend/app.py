@@ -2,8 +2,11 @@ from flask import Flask, request, send_file, jsonify
 from flask_cors import CORS
 import os
 import uuid
-import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
 import yt_dlp
+from download_store import DownloadStore
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -13,6 +16,142 @@ DOWNLOAD_DIR = "downloads"
 if not os.path.exists(DOWNLOAD_DIR):
     os.makedirs(DOWNLOAD_DIR)
 
+# Size-quota LRU index over the downloads directory
+DOWNLOAD_QUOTA_BYTES = int(os.environ.get("DOWNLOAD_QUOTA_MB", "2048")) * 1024 * 1024
+DOWNLOAD_MAX_AGE = 3600  # seconds an unused file may stay even under quota
+download_store = DownloadStore(DOWNLOAD_DIR, DOWNLOAD_QUOTA_BYTES, max_age=DOWNLOAD_MAX_AGE)
+download_store.start()
+
+# yt-dlp options per download mode
+DOWNLOAD_MODES = {
+    # Playable MP3 for the Flutter audio player (default)
+    'mp3': {
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'mp3',
+            'preferredquality': '192',
+        }],
+    },
+    # Keep the source audio stream as-is, no re-encode at all
+    'native': {},
+    # Decode once straight to what Whisper reads: 16 kHz mono 16-bit PCM
+    'whisper': {
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'wav',
+        }],
+        'postprocessor_args': {
+            'extractaudio': ['-ar', '16000', '-ac', '1', '-sample_fmt', 's16'],
+        },
+    },
+    # Same as 'whisper' but losslessly compressed
+    'flac': {
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'flac',
+        }],
+        'postprocessor_args': {
+            'extractaudio': ['-ar', '16000', '-ac', '1'],
+        },
+    },
+}
+
+# Worker pool for concurrent downloads, deduplicated per (video, mode)
+MAX_DOWNLOAD_WORKERS = int(os.environ.get("MAX_DOWNLOAD_WORKERS", "4"))
+download_pool = ThreadPoolExecutor(max_workers=MAX_DOWNLOAD_WORKERS)
+downloads_lock = threading.Lock()
+inflight_downloads = {}   # (video_id, mode) -> Future
+completed_downloads = {}  # (video_id, mode) -> result dict
+
+def video_key(youtube_url):
+    """
+    Reduce a YouTube URL to its video ID so different URL forms share one download
+    """
+    parsed = urlparse(youtube_url.strip())
+    host = parsed.netloc.lower()
+    parts = [p for p in parsed.path.split('/') if p]
+
+    if host.endswith('youtu.be') and parts:
+        return parts[0]
+    if 'youtube' in host:
+        video_ids = parse_qs(parsed.query).get('v')
+        if video_ids:
+            return video_ids[0]
+        if len(parts) >= 2 and parts[0] in ('shorts', 'embed', 'live'):
+            return parts[1]
+
+    return youtube_url.strip()
+
+def fetch_audio(youtube_url, mode):
+    """
+    Download the audio track of a video with yt-dlp in the given mode
+    """
+    file_id = str(uuid.uuid4())
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'outtmpl': os.path.join(DOWNLOAD_DIR, f"{file_id}.%(ext)s"),
+        'quiet': False,
+        'no_warnings': False,
+    }
+    ydl_opts.update(DOWNLOAD_MODES[mode])
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(youtube_url, download=True)
+        title = info.get('title', 'Unknown Title')
+
+    # The final path (after any postprocessing) is reported by yt-dlp
+    output_file = None
+    requested = info.get('requested_downloads') or []
+    if requested and requested[0].get('filepath'):
+        output_file = requested[0]['filepath']
+    else:
+        for file in os.listdir(DOWNLOAD_DIR):
+            if file.startswith(file_id):
+                output_file = os.path.join(DOWNLOAD_DIR, file)
+                break
+
+    if not output_file or not os.path.exists(output_file):
+        raise RuntimeError('Failed to download audio file')
+
+    download_store.add(file_id, output_file)
+
+    return {
+        'file_id': file_id,
+        'path': output_file,
+        'title': title,
+        'mode': mode,
+    }
+
+def submit_download(youtube_url, mode='mp3'):
+    """
+    Queue a download on the worker pool. Requests for a video that is already
+    downloading (or downloaded) in the same mode share the same result.
+    """
+    key = (video_key(youtube_url), mode)
+
+    with downloads_lock:
+        done = completed_downloads.get(key)
+        if done and done['file_id'] in download_store:
+            future = Future()
+            future.set_result(done)
+            return future
+
+        future = inflight_downloads.get(key)
+        if future is not None:
+            return future
+
+        future = download_pool.submit(fetch_audio, youtube_url, mode)
+        inflight_downloads[key] = future
+
+    def _finish(f):
+        with downloads_lock:
+            inflight_downloads.pop(key, None)
+            if f.exception() is None:
+                completed_downloads[key] = f.result()
+
+    future.add_done_callback(_finish)
+    return future
+
 @app.route('/', methods=['GET'])
 def index():
     return jsonify({"status": "Server is running"})
@@ -28,47 +167,25 @@ def download_audio():
         if not youtube_url:
             return jsonify({'error': 'No YouTube URL provided'}), 400
         
-        print(f"Processing YouTube URL: {youtube_url}")
-        
-        # Create unique filename
-        file_id = str(uuid.uuid4())
-        output_file = os.path.join(DOWNLOAD_DIR, f"{file_id}.mp3")
-        
-        # Set up yt-dlp options
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': os.path.join(DOWNLOAD_DIR, f"{file_id}.%(ext)s"),
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-            'quiet': False,
-            'no_warnings': False,
-        }
-        
-        # Download the video
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(youtube_url, download=True)
-            title = info.get('title', 'Unknown Title')
-        
-        # Find the actual output file (yt-dlp might have modified the filename)
-        for file in os.listdir(DOWNLOAD_DIR):
-            if file.startswith(file_id) and file.endswith('.mp3'):
-                output_file = os.path.join(DOWNLOAD_DIR, file)
-                break
-        
-        if not os.path.exists(output_file):
-            return jsonify({'error': 'Failed to download audio file'}), 500
-        
+        mode = data.get('mode', 'mp3')
+        if mode not in DOWNLOAD_MODES:
+            return jsonify({'error': f"Unknown mode '{mode}'"}), 400
+
+        print(f"Processing YouTube URL: {youtube_url} (mode: {mode})")
+
+        result = submit_download(youtube_url, mode).result()
+        output_file = result['path']
+
         print(f"Download complete: {output_file}")
-        
+
         # Return download URL
         download_url = f"/get_audio/{os.path.basename(output_file)}"
         return jsonify({
             'success': True,
             'download_url': download_url,
-            'title': title
+            'title': result['title'],
+            'file_id': result['file_id'],
+            'mode': mode
         })
         
     except Exception as e:
@@ -78,29 +195,32 @@ def download_audio():
 @app.route('/get_audio/<filename>', methods=['GET'])
 def get_audio(filename):
     try:
-        file_path = os.path.join(DOWNLOAD_DIR, filename)
-        if not os.path.exists(file_path):
+        file_id = os.path.splitext(os.path.basename(filename))[0]
+        file_path = download_store.acquire(file_id)
+        if file_path is None:
             return jsonify({'error': 'File not found'}), 404
-        
-        return send_file(file_path, as_attachment=True)
+
+        # Keep the file pinned until the response has been fully streamed
+        try:
+            response = send_file(file_path, as_attachment=True)
+        except Exception:
+            download_store.release(file_id)
+            raise
+        response.call_on_close(lambda: download_store.release(file_id))
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-# Clean up old files periodically
+# Eviction runs in the background; this forces a pass now
 @app.route('/cleanup', methods=['POST'])
 def cleanup():
     try:
-        # Delete files older than 1 hour
-        cutoff_time = time.time() - 3600
-        deleted_count = 0
-        
-        for filename in os.listdir(DOWNLOAD_DIR):
-            file_path = os.path.join(DOWNLOAD_DIR, filename)
-            if os.path.isfile(file_path) and os.path.getmtime(file_path) < cutoff_time:
-                os.remove(file_path)
-                deleted_count += 1
-                
-        return jsonify({'success': True, 'deleted_files': deleted_count})
+        deleted_count = download_store.evict()
+        return jsonify({
+            'success': True,
+            'deleted_files': deleted_count,
+            'store_bytes': download_store.total_bytes
+        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -0,0 +1,29 @@
+# backend/audio_utils.py
+import io
+import wave
+import numpy as np
+
+# Whisper works on 16 kHz mono float32 samples
+SAMPLE_RATE = 16000
+
+def read_pcm_wav(source):
+    """
+    Load a 16 kHz mono 16-bit WAV (path or bytes) as the float32 array Whisper expects.
+    Returns None if the file is not already in that layout, so callers can fall back
+    to Whisper's own ffmpeg decode.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        if source[:4] != b"RIFF" or source[8:12] != b"WAVE":
+            return None
+        source = io.BytesIO(source)
+
+    try:
+        with wave.open(source, "rb") as wav:
+            if (wav.getframerate() != SAMPLE_RATE or wav.getnchannels() != 1
+                    or wav.getsampwidth() != 2):
+                return None
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return None
+
+    return np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
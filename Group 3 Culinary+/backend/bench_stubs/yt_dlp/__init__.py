@@ -0,0 +1,37 @@
+# bench_stubs/yt_dlp/__init__.py
+# Stand-in for yt-dlp used by benchmark.py: "downloads" a local audio fixture
+# instead of hitting YouTube, so the download service can be load-tested offline.
+import os
+import time
+import shutil
+
+FIXTURE = os.environ.get("BENCH_AUDIO_FIXTURE", "")
+# Optional simulated network time per download, in seconds
+DELAY = float(os.environ.get("BENCH_DOWNLOAD_DELAY", "0"))
+
+class YoutubeDL:
+    def __init__(self, params=None):
+        self.params = params or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=True):
+        # Use the extension the real postprocessor would have produced
+        ext = os.path.splitext(FIXTURE)[1].lstrip(".")
+        for pp in self.params.get("postprocessors", []):
+            if pp.get("key") == "FFmpegExtractAudio":
+                ext = pp.get("preferredcodec", ext)
+
+        path = self.params["outtmpl"].replace("%(ext)s", ext)
+        if download:
+            time.sleep(DELAY)
+            shutil.copyfile(FIXTURE, path)
+
+        return {
+            "title": f"Benchmark video {url}",
+            "requested_downloads": [{"filepath": path}],
+        }
@@ -0,0 +1,8 @@
+# bench_stubs/yt_dlp/__main__.py
+# `python -m yt_dlp ... -o - URL` as used by pipeline.py: write the fixture to stdout
+import sys
+import shutil
+from . import FIXTURE
+
+with open(FIXTURE, "rb") as f:
+    shutil.copyfileobj(f, sys.stdout.buffer)
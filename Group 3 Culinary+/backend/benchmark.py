@@ -0,0 +1,269 @@
+# backend/benchmark.py
+"""
+Local benchmark / load test for the Culinary+ backend services.
+
+Each service is started as a subprocess on its usual port, fed synthetic
+transcripts or short generated audio fixtures, and measured at several
+concurrency levels. yt-dlp is replaced by the stub in bench_stubs/, so
+nothing touches the network.
+
+    python benchmark.py                              # all services, 1/4/16 clients
+    python benchmark.py --services model,bert --requests 100
+    python benchmark.py --concurrency 1,8 --json results.json
+"""
+import os
+import sys
+import json
+import time
+import wave
+import base64
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import psutil
+import requests
+from vad import speech_regions
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+STUBS_DIR = os.path.join(BACKEND_DIR, "bench_stubs")
+
+# Words for synthetic transcripts, with ingredients from the allergen fixture mixed in
+FILLER = ("now we are going to add a little bit of the and then mix it well until "
+          "it looks nice so just let that cook for about five minutes").split()
+INGREDIENTS = {
+    "butter": "Dairy", "milk": "Dairy", "peanut butter": "Peanut", "all purpose flour": "Gluten",
+    "eggs": "Egg", "soy sauce": "Soy", "shrimp": "Shellfish", "salt": "None", "sugar": "None",
+    "garlic": "None", "onion": "None", "olive oil": "None",
+}
+TRANSCRIPT_WORDS = (50, 200, 1000, 5000)
+AUDIO_SECONDS = (5, 15)
+
+def make_transcript(n_words, seed=0):
+    rng = random.Random(seed)
+    words = []
+    while len(words) < n_words:
+        if rng.random() < 0.1:
+            words.extend(rng.choice(list(INGREDIENTS)).split())
+        else:
+            words.append(rng.choice(FILLER))
+    return " ".join(words[:n_words])
+
+def make_audio(path, seconds, sample_rate=16000):
+    """
+    Voice-like bursts separated by silence, as 16 kHz mono WAV: harmonics of a
+    150 Hz pitch inside the 300-3400 Hz voice band, pulsed at a syllable rate, so
+    the whisper service's VAD passes them on to Whisper instead of skipping them
+    """
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    signal = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(2, 23))
+    signal *= 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2  # syllables
+    signal *= 0.3 / np.max(np.abs(signal))
+    signal *= (np.floor(t) % 3 == 0)  # one second on, two off: the VAD trims the gaps
+    # Otherwise the "whisper" numbers would only measure the VAD and an empty result
+    if not speech_regions(signal.astype(np.float32), sample_rate):
+        raise RuntimeError(f"VAD finds no speech in the {seconds}s audio fixture")
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes((signal * 32767).astype(np.int16).tobytes())
+    return path
+
+def make_allergen_csv(path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Ingredient,Possible Allergens\n")
+        for name, allergen in INGREDIENTS.items():
+            f.write(f"{name},{allergen}\n")
+    return path
+
+def build_services(workdir):
+    """Service name -> how to start it and the payloads to send, per size label"""
+    audio = {s: make_audio(os.path.join(workdir, f"audio_{s}s.wav"), s) for s in AUDIO_SECONDS}
+    transcripts = {n: make_transcript(n, seed=n) for n in TRANSCRIPT_WORDS}
+    counter = iter(range(10 ** 9))
+
+    def audio_payload(seconds):
+        with open(audio[seconds], "rb") as f:
+            body = {"audio": base64.b64encode(f.read()).decode()}
+        return lambda: ("post", "/transcribe", {"json": body})
+
+    return {
+        "model": {
+            "script": "model.py",
+            "port": 5002,
+            "env": {
+                "ALLERGEN_CSV": make_allergen_csv(os.path.join(workdir, "allergen_list.csv")),
+                "ALLERGEN_KB": os.path.join(workdir, "allergen_kb.bin"),
+            },
+            "payloads": {
+                f"{n} words": (lambda text: lambda: ("post", "/extract_ingredients", {"data": text.encode()}))(text)
+                for n, text in transcripts.items()
+            },
+        },
+        "bert": {
+            "script": "bert_server.py",
+            "port": 5002,
+            "env": {},
+            "payloads": {
+                f"{n} words": (lambda text: lambda: ("post", "/extract_ingredients", {"json": {"transcription": text}}))(text)
+                for n, text in transcripts.items()
+            },
+        },
+        "whisper": {
+            "script": "whisper_server.py",
+            "port": 5001,
+            "env": {},
+            "payloads": {f"{s}s audio": audio_payload(s) for s in AUDIO_SECONDS},
+        },
+        "download": {
+            "script": "app.py",
+            "port": 5000,
+            "env": {"BENCH_AUDIO_FIXTURE": audio[AUDIO_SECONDS[0]]},
+            # A fresh video ID per request so dedup doesn't turn it into a cache benchmark
+            "payloads": {
+                "stub yt-dlp": lambda: ("post", "/download", {
+                    "json": {"youtube_url": f"https://www.youtube.com/watch?v=bench{next(counter)}"}}),
+            },
+        },
+    }
+
+class RssSampler:
+    """Tracks the peak resident memory of a process and its children"""
+
+    def __init__(self, pid, interval=0.05):
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _rss(self):
+        total = 0
+        for proc in [self.process] + self.process.children(recursive=True):
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._rss())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.peak = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+def start_service(name, service, workdir, timeout=600):
+    env = dict(os.environ, **service["env"])
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (STUBS_DIR, env.get("PYTHONPATH")) if p)
+    log = open(os.path.join(workdir, f"{name}.log"), "wb")
+    # Run from the scratch dir so downloads/ and temp files don't land in the repo
+    proc = subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, service["script"])], cwd=workdir, env=env,
+                            stdout=log, stderr=subprocess.STDOUT)
+
+    # Any HTTP response means the server is accepting requests
+    base_url = f"http://127.0.0.1:{service['port']}"
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{name} exited during startup, see {log.name}")
+        try:
+            requests.get(base_url + "/", timeout=1)
+            return proc, base_url
+        except requests.RequestException:
+            time.sleep(0.5)
+
+    stop_service(proc)
+    raise RuntimeError(f"{name} did not start within {timeout}s")
+
+def stop_service(proc):
+    parent = psutil.Process(proc.pid)
+    for child in parent.children(recursive=True):
+        child.kill()
+    proc.kill()
+    proc.wait()
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[int(round(q * (len(sorted_values) - 1)))]
+
+def run_load(base_url, make_request, n_requests, concurrency):
+    def one(_):
+        method, path, kwargs = make_request()
+        start = time.perf_counter()
+        try:
+            ok = getattr(requests, method)(base_url + path, timeout=600, **kwargs).status_code == 200
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(n_requests)))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        "requests": n_requests,
+        "errors": sum(1 for _, ok in results if not ok),
+        "rps": round(n_requests / wall, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Culinary+ backend services")
+    parser.add_argument("--services", default="model,bert,whisper,download",
+                        help="comma-separated subset of model, bert, whisper, download")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated client counts")
+    parser.add_argument("--requests", type=int, default=50, help="requests per payload and concurrency level")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    rows = []
+
+    with tempfile.TemporaryDirectory(prefix="culinary-bench-") as workdir:
+        services = build_services(workdir)
+        for name in args.services.split(","):
+            service = services[name]
+            print(f"\nStarting {name} ({service['script']})...")
+            proc, base_url = start_service(name, service, workdir)
+            try:
+                sampler = RssSampler(proc.pid)
+                for label, make_request in service["payloads"].items():
+                    # One unmeasured request so lazy initialisation isn't counted
+                    run_load(base_url, make_request, 1, 1)
+                    for concurrency in levels:
+                        with sampler:
+                            stats = run_load(base_url, make_request, args.requests, concurrency)
+                        row = dict(service=name, payload=label, concurrency=concurrency,
+                                   peak_rss_mb=round(sampler.peak / 2 ** 20, 1), **stats)
+                        rows.append(row)
+                        print(f"  {label:>12}  x{concurrency:<3} {row['rps']:>8} req/s  "
+                              f"p50 {row['p50_ms']:>8} ms  p99 {row['p99_ms']:>8} ms  "
+                              f"peak RSS {row['peak_rss_mb']:>7} MB  errors {row['errors']}")
+            finally:
+                stop_service(proc)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+if __name__ == "__main__":
+    main()
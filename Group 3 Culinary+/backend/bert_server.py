@@ -2,14 +2,93 @@
 from flask import Flask, request, jsonify
 from transformers import AutoTokenizer, AutoModelForTokenClassification
 from transformers import pipeline
+from concurrent.futures import Future
+import os
+import queue
+import threading
+import time
 import torch
 
 app = Flask(__name__)
 
+MODEL_NAME = "dslim/bert-base-NER"
+
+# CPU inference settings
+#   BERT_BACKEND: "torch" (fp32), "int8" (dynamic int8 quantized Linear layers) or "onnx" (ONNX Runtime).
+#   int8 is opt-in: quantization shifts entity scores and boundaries, and those feed allergen
+#   screening, so check its entities against fp32 on your own transcripts before enabling it
+BERT_BACKEND = os.environ.get("BERT_BACKEND", "torch")
+NUM_THREADS = int(os.environ.get("BERT_THREADS", str(os.cpu_count() or 1)))
+MAX_BATCH_SIZE = int(os.environ.get("BERT_MAX_BATCH", "16"))
+BATCH_WAIT_MS = float(os.environ.get("BERT_BATCH_WAIT_MS", "5"))
+# Overlap (in tokens) between 512-token windows for long transcripts
+WINDOW_STRIDE = int(os.environ.get("BERT_WINDOW_STRIDE", "128"))
+
+torch.set_num_threads(NUM_THREADS)
+
+def load_model(backend):
+    """Load the NER model for the configured CPU backend"""
+    if backend == "onnx":
+        from optimum.onnxruntime import ORTModelForTokenClassification
+        return ORTModelForTokenClassification.from_pretrained(MODEL_NAME, export=True)
+
+    model = AutoModelForTokenClassification.from_pretrained(MODEL_NAME).eval()
+    if backend == "int8":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
 # Load NER model for ingredient extraction
-tokenizer = AutoTokenizer.from_pretrained("dslim/bert-base-NER")
-model = AutoModelForTokenClassification.from_pretrained("dslim/bert-base-NER")
-ner_pipeline = pipeline("ner", model=model, tokenizer=tokenizer, aggregation_strategy="simple")
+tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+model = load_model(BERT_BACKEND)
+# stride makes the pipeline split long inputs into overlapping windows and
+# merge entities across window boundaries instead of truncating at 512 tokens
+ner_pipeline = pipeline("ner", model=model, tokenizer=tokenizer,
+                        aggregation_strategy="simple", stride=WINDOW_STRIDE)
+
+class MicroBatcher:
+    """
+    Groups concurrent requests that arrive within a few milliseconds of each
+    other into a single batched pipeline call
+    """
+
+    def __init__(self, fn, max_batch_size, wait_ms):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.wait = wait_ms / 1000.0
+        self.pending = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, text):
+        future = Future()
+        self.pending.put((text, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.wait
+            try:
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    batch.append(self.pending.get(timeout=timeout))
+            except queue.Empty:
+                pass
+
+            texts = [text for text, _ in batch]
+            try:
+                with torch.no_grad():
+                    results = self.fn(texts, batch_size=len(texts))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), entities in zip(batch, results):
+                future.set_result(entities)
+
+ner_batcher = MicroBatcher(ner_pipeline, MAX_BATCH_SIZE, BATCH_WAIT_MS)
 
 @app.route('/extract_ingredients', methods=['POST'])
 def extract_ingredients_api():
@@ -33,7 +112,7 @@ def extract_ingredients(transcription_text):
     Extract food ingredients from transcription text using BERT NER model
     """
     # Get named entities from the transcription
-    entities = ner_pipeline(transcription_text)
+    entities = ner_batcher.submit(transcription_text).result()
     
     # Filter for likely ingredients
     # This is a basic implementation - you may need to refine it based on your specific needs
@@ -60,4 +139,4 @@ def extract_ingredients(transcription_text):
     return unique_ingredients
 
 if __name__ == '__main__':
-    app.run(host='127.0.0.1', port=5002)
\ No newline at end of file
+    app.run(host='127.0.0.1', port=5002, threaded=True)
\ No newline at end of file
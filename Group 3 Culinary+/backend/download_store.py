@@ -0,0 +1,152 @@
+# backend/download_store.py
+import os
+import time
+import threading
+from collections import OrderedDict
+
+class DownloadStore:
+    """
+    In-memory index of the downloads directory with a byte quota enforced by LRU.
+    Entries are keyed by file ID (the file name without extension); files that
+    are pinned by an active request are never evicted.
+    """
+
+    def __init__(self, directory, quota_bytes, max_age=None, interval=30):
+        self.directory = directory
+        self.quota_bytes = quota_bytes
+        self.max_age = max_age
+        self.interval = interval
+        self.entries = OrderedDict()  # file_id -> entry, least recently used first
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_existing()
+
+    def _load_existing(self):
+        """Index files left over from a previous run, oldest access first"""
+        found = []
+        for filename in os.listdir(self.directory):
+            path = os.path.join(self.directory, filename)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                found.append((stat.st_mtime, filename, stat.st_size))
+
+        for mtime, filename, size in sorted(found):
+            file_id = os.path.splitext(filename)[0]
+            self.entries[file_id] = {
+                "filename": filename,
+                "size": size,
+                "last_access": mtime,
+                "readers": 0,
+            }
+            self.total_bytes += size
+
+    def add(self, file_id, path):
+        """Register a finished download"""
+        size = os.path.getsize(path)
+        with self.lock:
+            old = self.entries.pop(file_id, None)
+            if old:
+                self.total_bytes -= old["size"]
+            self.entries[file_id] = {
+                "filename": os.path.basename(path),
+                "size": size,
+                "last_access": time.time(),
+                "readers": old["readers"] if old else 0,
+            }
+            self.total_bytes += size
+            over_quota = self.total_bytes > self.quota_bytes
+
+        # Don't wait for the next tick when a download pushes us over quota
+        if over_quota:
+            self._wake.set()
+
+    def get(self, file_id):
+        """Return the path for a file ID and mark it as recently used, or None"""
+        with self.lock:
+            entry = self.entries.get(file_id)
+            if entry is None:
+                return None
+            entry["last_access"] = time.time()
+            self.entries.move_to_end(file_id)
+            return os.path.join(self.directory, entry["filename"])
+
+    def __contains__(self, file_id):
+        with self.lock:
+            return file_id in self.entries
+
+    def acquire(self, file_id):
+        """Pin a file while a request is reading it. Returns its path, or None."""
+        with self.lock:
+            entry = self.entries.get(file_id)
+            if entry is None:
+                return None
+            entry["readers"] += 1
+            entry["last_access"] = time.time()
+            self.entries.move_to_end(file_id)
+            return os.path.join(self.directory, entry["filename"])
+
+    def release(self, file_id):
+        with self.lock:
+            entry = self.entries.get(file_id)
+            if entry and entry["readers"] > 0:
+                entry["readers"] -= 1
+
+    def evict(self, max_age=None):
+        """
+        Delete unpinned files, least recently used first, until the store is
+        under quota. Files idle for longer than max_age seconds go regardless.
+        Returns the number of files deleted.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        cutoff = time.time() - max_age if max_age is not None else None
+        victims = []
+
+        with self.lock:
+            over = self.total_bytes - self.quota_bytes
+            for file_id, entry in self.entries.items():
+                if entry["readers"]:
+                    continue
+                expired = cutoff is not None and entry["last_access"] < cutoff
+                if over > 0 or expired:
+                    victims.append(file_id)
+                    over -= entry["size"]
+
+            victims = [(file_id, self.entries.pop(file_id)) for file_id in victims]
+            for _, entry in victims:
+                self.total_bytes -= entry["size"]
+
+        # Unlink outside the lock, files are no longer reachable through the index
+        for _, entry in victims:
+            try:
+                os.remove(os.path.join(self.directory, entry["filename"]))
+            except OSError as e:
+                print(f"Could not delete {entry['filename']}: {str(e)}")
+        return len(victims)
+
+    def start(self):
+        """Run eviction in a background daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                deleted = self.evict()
+                if deleted:
+                    print(f"Evicted {deleted} downloads ({self.total_bytes} bytes in store)")
+            except Exception as e:
+                print(f"Eviction error: {str(e)}")
@@ -1,7 +1,9 @@
-import spacy
+import os
+import json
+import threading
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import pandas as pd
+import allergen_kb
 
 # Dictionary mapping ingredients to potential allergens
 allergen_mapping = {
@@ -51,54 +53,153 @@ allergen_mapping = {
     "vanilla extract": "Alcohol Sensitivity/Corn Allergy",
     "vanilla": "Spice Allergy"
 }
-df = pd.read_csv("C:/Users/visak/Downloads/allergen_list.csv")
+# The CSV is compiled into an mmap-able KB file (see allergen_kb.py), rebuilt when the CSV changes
+ALLERGEN_CSV = os.environ.get("ALLERGEN_CSV", "C:/Users/visak/Downloads/allergen_list.csv")
+ALLERGEN_KB = os.environ.get("ALLERGEN_KB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "allergen_kb.bin"))
 
-df = pd.read_csv("C:/Users/visak/Downloads/allergen_list.csv")
-df["Ingredient"] = df["Ingredient"].str.lower().str.strip()
-df["Possible Allergens"] = df["Possible Allergens"].fillna("None").str.strip()
+kb = allergen_kb.load_or_build(ALLERGEN_CSV, ALLERGEN_KB)
 
-ingredient_set = set(df["Ingredient"])
-ingredient_allergen_map = dict(zip(df["Ingredient"], df["Possible Allergens"]))
+def _reload_kb(new_kb):
+    global kb
+    kb = new_kb
 
+allergen_kb.watch(ALLERGEN_CSV, ALLERGEN_KB, _reload_kb)
 
-# Load your custom SpaCy model
-nlp = spacy.load("C:\\Project\\saved_model")
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS
 
-def extract_ingredients_and_allergens(text):
+# Per-user allergy profiles, compiled to allergen bitmasks (see allergen_kb.ALLERGEN_CATEGORIES)
+USER_PROFILES = os.environ.get("USER_PROFILES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "user_profiles.json"))
+profiles_lock = threading.Lock()
+user_allergies = {}  # user_id -> allergy names as sent by the app
+user_masks = {}      # user_id -> bitmask
+
+if os.path.exists(USER_PROFILES):
+    with open(USER_PROFILES, "r", encoding="utf-8") as f:
+        user_allergies = json.load(f)
+    for uid, allergies in user_allergies.items():
+        try:
+            user_masks[uid] = allergen_kb.profile_mask(allergies)
+        except ValueError as e:
+            # Unscreened rather than wrongly "safe": /screen asks for the allergies again
+            print(f"Ignoring stored profile of {uid}: {str(e)}")
+
+def match_ingredients(text):
+    """The KB in use and the indices of ingredients found in the text"""
     words = text.lower().replace(",", "").replace(".", "").split()
-    found_ingredients = set()
-    for i in range(len(words)):
-        for j in range(i + 1, len(words) + 1):
-            phrase = " ".join(words[i:j])
-            if phrase in ingredient_set:
-                found_ingredients.add(phrase)
+    current = kb  # stay on one KB even if a reload swaps it mid-request
+    return current, current.match(words)
+
+def extract_ingredients_and_allergens(text):
+    current, found = match_ingredients(text)
 
     result = []
-    for ing in found_ingredients:
-        allergen = ingredient_allergen_map.get(ing, "None")
-        result.append((ing, allergen))
+    for i in found:
+        result.append((current.ingredient(i), current.allergen(i)))
 
     return result
 
+def unsafe_ingredients(current, found, mask):
+    """Ingredients whose allergen bits overlap the user's mask"""
+    unsafe = []
+    for i in found:
+        conflict = current.mask(i) & mask
+        if conflict:
+            unsafe.append({
+                "name": current.ingredient(i),
+                "allergen": current.allergen(i),
+                "conflicts": allergen_kb.mask_names(conflict)
+            })
+    return unsafe
+
 @app.route('/extract_ingredients', methods=['POST'])
 def extract_ingredients():
     transcript = request.data.decode('utf-8')  # Raw text
 
-    ingredients_and_allergens = extract_ingredients_and_allergens(transcript)
+    current, found = match_ingredients(transcript)
+    # Optionally flag ingredients unsafe for a known user
+    mask = user_masks.get(request.args.get('user_id'))
 
     results = []
-    for ingredient, allergen in ingredients_and_allergens:
-        results.append({
-            "name": ingredient,
-            "allergen": allergen
-        })
+    for i in found:
+        item = {
+            "name": current.ingredient(i),
+            "allergen": current.allergen(i)
+        }
+        if mask is not None:
+            item["unsafe"] = bool(current.mask(i) & mask)
+        results.append(item)
 
     return jsonify({"ingredients": results})
 
+@app.route('/profiles/<user_id>', methods=['POST', 'PUT'])
+def save_profile(user_id):
+    """Store a user's allergies (from allergy_preferences_screen) as a bitmask"""
+    data = request.get_json(silent=True) or {}
+    allergies = data.get('allergies')
+    if not isinstance(allergies, list):
+        return jsonify({"error": "No allergies provided"}), 400
+    try:
+        mask = allergen_kb.profile_mask(allergies)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    with profiles_lock:
+        user_allergies[user_id] = allergies
+        user_masks[user_id] = mask
+        with open(USER_PROFILES, "w", encoding="utf-8") as f:
+            json.dump(user_allergies, f, indent=2)
+
+    return jsonify({"user_id": user_id, "mask": mask, "categories": allergen_kb.mask_names(mask)})
+
+@app.route('/screen', methods=['POST'])
+def screen():
+    """
+    Which detected ingredients are unsafe for a user. Takes "user_id" (or an inline
+    "allergies" list) plus a "transcript", a list of already detected "ingredients",
+    or a "recipes" object mapping recipe IDs to transcripts.
+    """
+    data = request.get_json(silent=True) or {}
+    if 'allergies' in data:
+        try:
+            mask = allergen_kb.profile_mask(data['allergies'])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    elif data.get('user_id') in user_masks:
+        mask = user_masks[data['user_id']]
+    else:
+        return jsonify({"error": "Unknown user and no allergies provided"}), 400
+
+    if 'recipes' in data:
+        if not isinstance(data['recipes'], dict) or \
+                not all(isinstance(t, str) for t in data['recipes'].values()):
+            return jsonify({"error": "recipes must map recipe IDs to transcripts"}), 400
+        recipes = {}
+        for recipe_id, transcript in data['recipes'].items():
+            unsafe = unsafe_ingredients(*match_ingredients(transcript), mask)
+            recipes[recipe_id] = {"safe": not unsafe, "unsafe": unsafe}
+        return jsonify({"recipes": recipes})
+
+    if 'ingredients' in data:
+        if not isinstance(data['ingredients'], list) or \
+                not all(isinstance(name, str) for name in data['ingredients']):
+            return jsonify({"error": "ingredients must be a list of strings"}), 400
+        current = kb
+        found = []
+        for name in data['ingredients']:
+            name = " ".join(name.lower().split())
+            found += [i for i in current.match(name.split()) if current.ingredient(i) == name]
+        unsafe = unsafe_ingredients(current, found, mask)
+    elif 'transcript' in data:
+        if not isinstance(data['transcript'], str):
+            return jsonify({"error": "transcript must be a string"}), 400
+        unsafe = unsafe_ingredients(*match_ingredients(data['transcript']), mask)
+    else:
+        return jsonify({"error": "No transcript, ingredients or recipes provided"}), 400
+
+    return jsonify({"safe": not unsafe, "unsafe": unsafe})
+
 
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=5002, debug=True)
\ No newline at end of file
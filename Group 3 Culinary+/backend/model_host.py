@@ -0,0 +1,75 @@
+# backend/model_host.py
+import gc
+import os
+import sys
+import time
+import signal
+import socket
+from werkzeug.serving import make_server
+
+def serve(app, host, port, workers=1, on_worker_start=None):
+    """
+    Serve a Flask app whose models were already loaded at import time.
+
+    With workers > 1 this process becomes a model host: it binds the socket and
+    forks the workers, which share the loaded weights copy-on-write instead of
+    each loading their own copy. on_worker_start (e.g. a warm-up inference)
+    runs in every worker before it starts accepting requests.
+    Falls back to a single process where fork is not available (Windows).
+    """
+    if workers <= 1 or not hasattr(os, "fork"):
+        if on_worker_start:
+            on_worker_start()
+        print(f"Serving on http://{host}:{port}")
+        make_server(host, port, app, threaded=True).serve_forever()
+        return
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(128)
+    sock.set_inheritable(True)
+
+    # Move everything loaded so far out of the GC's reach so collections in
+    # the workers don't write to (and un-share) those pages
+    gc.freeze()
+
+    children = set()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                if on_worker_start:
+                    on_worker_start()
+                print(f"Worker {os.getpid()} ready")
+                make_server(host, port, app, threaded=True, fd=sock.fileno()).serve_forever()
+            finally:
+                os._exit(1)
+        children.add(pid)
+
+    def shutdown(signum, frame):
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for _ in range(workers):
+        spawn()
+    print(f"Model host {os.getpid()} serving on http://{host}:{port} with {workers} workers")
+
+    # Replace workers that die
+    while True:
+        pid, _ = os.wait()
+        if pid in children:
+            children.discard(pid)
+            print(f"Worker {pid} exited, restarting")
+            time.sleep(1)
+            spawn()
@@ -0,0 +1,209 @@
+# backend/pipeline.py
+import sys
+import time
+import queue
+import tempfile
+import threading
+import subprocess
+import numpy as np
+from audio_utils import SAMPLE_RATE
+
+# Whisper decodes in 30 s windows, so that is the natural chunk size
+CHUNK_SECONDS = 30
+
+# Marks the end of a stage's output
+_DONE = object()
+# How often a stage blocked on a queue checks for cancellation
+POLL_SECONDS = 0.5
+
+def _put(q, item, cancel):
+    """Queue put that gives up once the pipeline is cancelled; False if it did"""
+    while not cancel.is_set():
+        try:
+            q.put(item, timeout=POLL_SECONDS)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def _get(q, cancel):
+    """Queue get that returns _DONE once the pipeline is cancelled"""
+    while not cancel.is_set():
+        try:
+            return q.get(timeout=POLL_SECONDS)
+        except queue.Empty:
+            pass
+    return _DONE
+
+def stream_pcm(youtube_url, chunk_seconds=CHUNK_SECONDS, cancel=None):
+    """
+    Yield 16 kHz mono float32 chunks of a video's audio while yt-dlp is still downloading it.
+    yt-dlp writes the native stream to stdout and ffmpeg decodes it to PCM on the fly.
+    Setting the cancel event stops the stream and kills both processes.
+    """
+    # stderr goes to a file: nobody reads a pipe until the end, and a full one would stall yt-dlp
+    log = tempfile.TemporaryFile()
+    ytdlp = subprocess.Popen(
+        [sys.executable, "-m", "yt_dlp", "-f", "bestaudio/best", "--quiet", "-o", "-", youtube_url],
+        stdout=subprocess.PIPE, stderr=log,
+    )
+    ffmpeg = subprocess.Popen(
+        ["ffmpeg", "-loglevel", "error", "-i", "pipe:0",
+         "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"],
+        stdin=ytdlp.stdout, stdout=subprocess.PIPE,
+    )
+    ytdlp.stdout.close()  # ffmpeg owns the pipe now
+
+    chunk_bytes = chunk_seconds * SAMPLE_RATE * 2
+    received = 0
+    try:
+        while not (cancel and cancel.is_set()):
+            data = ffmpeg.stdout.read(chunk_bytes)
+            if not data:
+                break
+            received += len(data)
+            yield np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+    finally:
+        # Stop both processes if the consumer gave up early or the pipeline was cancelled
+        for proc in (ffmpeg, ytdlp):
+            if proc.poll() is None:
+                proc.kill()
+        ffmpeg.stdout.close()
+        ffmpeg.wait()
+        ytdlp.wait()
+        log.seek(0)
+        stderr = log.read().decode(errors="replace")
+        log.close()
+
+    if cancel and cancel.is_set():
+        return
+    if ytdlp.returncode != 0 or received == 0:
+        raise RuntimeError(f"yt-dlp download failed: {stderr.strip()[-500:]}")
+
+def run_pipeline(youtube_url, transcribe_fn, extract_fn, carry_words=4, chunk_seconds=CHUNK_SECONDS,
+                 cancel=None):
+    """
+    Download, transcribe and extract ingredients with all three stages overlapped.
+
+    transcribe_fn(audio, prompt) returns a Whisper-style result for one chunk and
+    extract_fn(text) returns (ingredient, allergen) pairs. Yields events as they happen:
+    "segment" for each transcript segment, "ingredient" for each newly found ingredient,
+    then a final "done" (or "error") event with the full transcript and stage timings.
+
+    Every stage stops at its next chunk once the cancel event is set, which happens
+    when a stage fails, when this generator is closed, or when the caller sets it
+    (e.g. the client disconnected).
+    """
+    cancel = cancel or threading.Event()
+    audio_q = queue.Queue(maxsize=2)  # bounded so download can't run far ahead
+    text_q = queue.Queue()
+    events = queue.Queue()
+    busy = {"download": 0.0, "transcribe": 0.0, "extract": 0.0}
+    transcript = []
+    ingredients = []
+    started = time.time()
+
+    def download_stage():
+        chunks = stream_pcm(youtube_url, chunk_seconds, cancel)
+        try:
+            while True:
+                t0 = time.time()
+                chunk = next(chunks, None)
+                busy["download"] += time.time() - t0
+                if chunk is None or not _put(audio_q, chunk, cancel):
+                    break
+        except Exception as e:
+            cancel.set()
+            events.put({"type": "error", "stage": "download", "error": str(e)})
+        finally:
+            chunks.close()  # kills yt-dlp and ffmpeg if they are still running
+            _put(audio_q, _DONE, cancel)
+
+    def transcribe_stage():
+        offset = 0.0
+        prompt = None
+        try:
+            while True:
+                chunk = _get(audio_q, cancel)
+                if chunk is _DONE:
+                    break
+                t0 = time.time()
+                result = transcribe_fn(chunk, prompt)
+                busy["transcribe"] += time.time() - t0
+
+                text = result["text"].strip()
+                for seg in result.get("segments", []):
+                    events.put({
+                        "type": "segment",
+                        "start": round(offset + seg["start"], 2),
+                        "end": round(offset + seg["end"], 2),
+                        "text": seg["text"].strip(),
+                    })
+                if text:
+                    transcript.append(text)
+                    text_q.put(text)
+                    prompt = text  # keeps wording consistent across chunk cuts
+                offset += len(chunk) / SAMPLE_RATE
+        except Exception as e:
+            # Also stops the download, which would otherwise block on a full queue
+            cancel.set()
+            events.put({"type": "error", "stage": "transcribe", "error": str(e)})
+        finally:
+            text_q.put(_DONE)
+
+    def extract_stage():
+        seen = set()
+        carry = ""
+        try:
+            while True:
+                text = _get(text_q, cancel)
+                if text is _DONE:
+                    break
+                # Prepend the previous chunk's tail so phrases split across chunks still match
+                t0 = time.time()
+                found = extract_fn(f"{carry} {text}".strip())
+                busy["extract"] += time.time() - t0
+                carry = " ".join(text.split()[-carry_words:])
+
+                for name, allergen in found:
+                    if name not in seen:
+                        seen.add(name)
+                        item = {"name": name, "allergen": allergen}
+                        ingredients.append(item)
+                        events.put(dict(item, type="ingredient"))
+        except Exception as e:
+            cancel.set()
+            events.put({"type": "error", "stage": "extract", "error": str(e)})
+        finally:
+            events.put(_DONE)
+
+    threads = [threading.Thread(target=stage, daemon=True)
+               for stage in (download_stage, transcribe_stage, extract_stage)]
+    for thread in threads:
+        thread.start()
+
+    failed = None
+    try:
+        while True:
+            event = events.get()
+            if event is _DONE:
+                break
+            if event["type"] == "error":
+                failed = failed or event
+                continue
+            yield event
+    finally:
+        # Runs on GeneratorExit too, so a consumer that stops reading stops the stages
+        cancel.set()
+
+    if failed:
+        yield failed
+        return
+
+    yield {
+        "type": "done",
+        "transcript": " ".join(transcript),
+        "ingredients": ingredients,
+        "timings": {stage: round(seconds, 2) for stage, seconds in busy.items()},
+        "elapsed": round(time.time() - started, 2),
+    }
@@ -0,0 +1,85 @@
+# pipeline_server.py
+import json
+import threading
+from flask import Flask, request, jsonify, Response, stream_with_context
+from flask_cors import CORS
+import whisper
+from pipeline import run_pipeline
+from vad import transcribe_speech
+import model as allergen_model
+
+app = Flask(__name__)
+CORS(app)
+
+model = whisper.load_model("base")
+
+def transcribe_chunk(audio, prompt):
+    # Only the speech regions of each chunk reach Whisper
+    return transcribe_speech(model, audio, initial_prompt=prompt, fp16=False)
+
+@app.route('/process', methods=['POST'])
+def process():
+    """
+    YouTube URL -> transcript -> ingredients in one call, with download,
+    transcription and extraction running concurrently on 30 s chunks
+    """
+    data = request.get_json() or {}
+    youtube_url = data.get('youtube_url')
+    if not youtube_url:
+        return jsonify({"error": "No YouTube URL provided"}), 400
+
+    try:
+        result = None
+        # Carry the longest ingredient phrase across chunks so matches can span them
+        for event in run_pipeline(youtube_url, transcribe_chunk,
+                                  allergen_model.extract_ingredients_and_allergens,
+                                  carry_words=allergen_model.kb.max_phrase_words):
+            result = event
+        if result["type"] == "error":
+            return jsonify({"error": result["error"], "stage": result["stage"]}), 500
+
+        return jsonify({
+            "success": True,
+            "transcript": result["transcript"],
+            "ingredients": result["ingredients"],
+            "timings": result["timings"],
+            "elapsed": result["elapsed"]
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/process/stream', methods=['GET', 'POST'])
+def process_stream():
+    """
+    Same pipeline as /process, streamed as Server-Sent Events: "segment" events with
+    transcript text and "ingredient" events with allergen flags are sent as soon as each
+    chunk is processed, then a final "done" (or "error") event.
+    """
+    data = request.get_json(silent=True) or {}
+    youtube_url = data.get('youtube_url') or request.args.get('youtube_url')
+    if not youtube_url:
+        return jsonify({"error": "No YouTube URL provided"}), 400
+
+    def generate():
+        cancel = threading.Event()
+        try:
+            events = run_pipeline(youtube_url, transcribe_chunk,
+                                  allergen_model.extract_ingredients_and_allergens,
+                                  carry_words=allergen_model.kb.max_phrase_words, cancel=cancel)
+            for event in events:
+                if event["type"] == "ingredient":
+                    event["has_allergen"] = event["allergen"] != "None"
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            error = {"type": "error", "stage": "pipeline", "error": str(e)}
+            yield f"event: error\ndata: {json.dumps(error)}\n\n"
+        finally:
+            # Client disconnected (GeneratorExit) or done: stop download, Whisper and NER
+            cancel.set()
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+if __name__ == '__main__':
+    print("Pipeline server running on http://0.0.0.0:5003")
+    app.run(host='0.0.0.0', port=5003, threaded=True)
@@ -0,0 +1,107 @@
+# backend/vad.py
+from bisect import bisect_right
+import numpy as np
+from audio_utils import SAMPLE_RATE
+
+FRAME_MS = 30
+# Frames per FFT block, keeps the spectrum of long videos from filling memory
+BLOCK_FRAMES = 4096
+
+def speech_regions(audio, sample_rate=SAMPLE_RATE, margin_db=10.0, floor_db=-45.0, loud_db=-30.0,
+                   band_ratio=0.45, min_speech=0.1, pad=0.25, min_gap=0.5):
+    """
+    Energy-based voice activity detection on float32 PCM.
+
+    A 30 ms frame counts as speech when it is margin_db louder than the noise floor
+    (10th percentile frame) and most of its energy sits in the 300-3400 Hz voice band,
+    which rules out most sizzling and hiss. Frames above loud_db pass the energy test
+    regardless of the floor, so steady-level audio (narration over music) is not lost.
+    Speech runs are padded and runs closer than min_gap are merged. Returns a list of
+    (start, end) times in seconds.
+    """
+    frame_len = sample_rate * FRAME_MS // 1000
+    n_frames = len(audio) // frame_len
+    duration = len(audio) / sample_rate
+    if n_frames == 0:
+        return [(0.0, duration)] if len(audio) else []
+
+    frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+    db = 20 * np.log10(np.sqrt(np.mean(frames ** 2, axis=1)) + 1e-10)
+    threshold = max(min(np.percentile(db, 10) + margin_db, loud_db), floor_db)
+
+    freqs = np.fft.rfftfreq(frame_len, 1.0 / sample_rate)
+    band = (freqs >= 300) & (freqs <= 3400)
+    window = np.hanning(frame_len).astype(np.float32)
+    ratio = np.empty(n_frames)
+    for i in range(0, n_frames, BLOCK_FRAMES):
+        power = np.abs(np.fft.rfft(frames[i:i + BLOCK_FRAMES] * window, axis=1)) ** 2
+        ratio[i:i + BLOCK_FRAMES] = power[:, band].sum(axis=1) / (power.sum(axis=1) + 1e-10)
+
+    voiced = (db > threshold) & (ratio > band_ratio)
+
+    # Run boundaries as frame indices
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+    frame_seconds = frame_len / sample_rate
+
+    regions = []
+    for start, end in zip(edges[::2], edges[1::2]):
+        if (end - start) * frame_seconds < min_speech:
+            continue
+        start = max(0.0, start * frame_seconds - pad)
+        end = min(duration, end * frame_seconds + pad)
+        if regions and start - regions[-1][1] < min_gap:
+            regions[-1][1] = max(regions[-1][1], end)
+        else:
+            regions.append([start, end])
+
+    return [(float(start), float(end)) for start, end in regions]
+
+def transcribe_speech(model, audio, sample_rate=SAMPLE_RATE, full_threshold=0.9, min_fraction=0.05, **options):
+    """
+    Transcribe only the speech regions of the audio with Whisper.
+
+    The regions are concatenated into one shorter clip, so Whisper's cost drops with
+    the non-speech share, and segment/word timestamps are mapped back onto the
+    original timeline. If nearly everything is speech the audio is used as-is, and
+    so it is when the VAD finds (almost) none: a recipe video without speech is more
+    likely a VAD miss than a real one, and a lost transcript is worse than a slow one.
+    """
+    duration = len(audio) / sample_rate
+    regions = speech_regions(audio, sample_rate)
+    speech_seconds = sum(end - start for start, end in regions)
+
+    if speech_seconds < min_fraction * duration:
+        result = model.transcribe(audio, **options)
+        result.update(speech_seconds=round(duration, 2), duration=duration, vad_fallback=True)
+        return result
+
+    if speech_seconds >= full_threshold * duration:
+        result = model.transcribe(audio, **options)
+        result.update(speech_seconds=round(duration, 2), duration=duration)
+        return result
+
+    pieces = []
+    clip_starts = []    # where each region starts in the concatenated clip
+    source_starts = []  # where it starts in the original audio
+    position = 0
+    for start, end in regions:
+        a, b = int(start * sample_rate), int(end * sample_rate)
+        pieces.append(audio[a:b])
+        clip_starts.append(position / sample_rate)
+        source_starts.append(a / sample_rate)
+        position += b - a
+
+    def remap(t):
+        i = max(0, bisect_right(clip_starts, t) - 1)
+        return round(source_starts[i] + (t - clip_starts[i]), 2)
+
+    result = model.transcribe(np.concatenate(pieces), **options)
+    for segment in result.get("segments", []):
+        segment["start"] = remap(segment["start"])
+        segment["end"] = remap(segment["end"])
+        for word in segment.get("words", []):
+            word["start"] = remap(word["start"])
+            word["end"] = remap(word["end"])
+
+    result.update(speech_seconds=round(speech_seconds, 2), duration=duration)
+    return result
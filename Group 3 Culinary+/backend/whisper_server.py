@@ -3,38 +3,110 @@ from flask import Flask, request, jsonify
 import whisper
 import base64
 import os
+import time
+import numpy as np
+import torch
 from flask_cors import CORS
+from audio_utils import read_pcm_wav, SAMPLE_RATE
+from vad import transcribe_speech
+from model_host import serve
 
 app = Flask(__name__)
 CORS(app)
 
-model = whisper.load_model("base")
+WHISPER_MODEL_NAME = os.environ.get("WHISPER_MODEL", "base")
+# >1 loads the model once here and forks workers that share it (POSIX only)
+WHISPER_WORKERS = int(os.environ.get("WHISPER_WORKERS", "1"))
+# Skip silence/music/sizzle before Whisper (set WHISPER_VAD=0 to transcribe everything)
+WHISPER_VAD = os.environ.get("WHISPER_VAD", "1") == "1"
+
+load_start = time.time()
+model = whisper.load_model(WHISPER_MODEL_NAME)
+MODEL_STATE = {
+    "model": WHISPER_MODEL_NAME,
+    "load_seconds": round(time.time() - load_start, 2),
+    "warmup_seconds": None,
+    "ready": False,
+}
+
+def warm_up():
+    """Run one inference on a second of silence so the first request isn't the slow one"""
+    if WHISPER_WORKERS > 1:
+        # Split the cores between workers instead of oversubscribing them
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // WHISPER_WORKERS))
+    start = time.time()
+    model.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), fp16=False)
+    MODEL_STATE["warmup_seconds"] = round(time.time() - start, 2)
+    MODEL_STATE["ready"] = True
+
+# Shared with app.py so downloads can be transcribed in place
+DOWNLOAD_DIR = "downloads"
+
+def run_transcription(audio):
+    """Transcribe decoded 16 kHz audio and shape the JSON response"""
+    if WHISPER_VAD:
+        result = transcribe_speech(model, audio, fp16=False)
+    else:
+        result = model.transcribe(audio, fp16=False)
+
+    segments = [
+        {"start": round(seg["start"], 2), "end": round(seg["end"], 2), "text": seg["text"].strip()}
+        for seg in result.get("segments", [])
+    ]
+    response = {"text": result["text"], "segments": segments}
+    if "speech_seconds" in result:
+        response["speech_seconds"] = result["speech_seconds"]
+        response["duration"] = round(result["duration"], 2)
+    return jsonify(response)
 
 @app.route('/transcribe', methods=['POST'])
 def transcribe():
     try:
+        # Transcribe a file app.py already downloaded (e.g. mode "whisper")
+        filename = request.json.get('filename')
+        if filename:
+            file_path = os.path.join(DOWNLOAD_DIR, os.path.basename(filename))
+            if not os.path.exists(file_path):
+                return jsonify({"error": "File not found"}), 404
+
+            # 16 kHz mono PCM goes straight to the model, anything else is decoded once by ffmpeg
+            audio = read_pcm_wav(file_path)
+            if audio is None:
+                audio = whisper.load_audio(file_path)
+            return run_transcription(audio)
+
         # Get audio data from request
         if 'audio' in request.json:
             audio_bytes = base64.b64decode(request.json['audio'])
-            
+
+            # Already Whisper-ready PCM: no temp file, no second decode
+            audio = read_pcm_wav(audio_bytes)
+            if audio is not None:
+                return run_transcription(audio)
+
             # Save to temporary file
             temp_file = "temp_audio.mp3"
             with open(temp_file, "wb") as f:
                 f.write(audio_bytes)
             
-            # Transcribe
-            result = model.transcribe(temp_file)
-            
-            # Clean up
+            # Decode, then clean up
+            audio = whisper.load_audio(temp_file)
             if os.path.exists(temp_file):
                 os.remove(temp_file)
-                
-            return jsonify({"text": result["text"]})
+
+            # Transcribe
+            return run_transcription(audio)
         else:
             return jsonify({"error": "No audio data provided"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once the model is loaded and warmed up in this worker"""
+    state = dict(MODEL_STATE, pid=os.getpid(), workers=WHISPER_WORKERS)
+    return jsonify(state), 200 if state["ready"] else 503
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001)  # Note: Using port 5001 instead of 5000
-    print("Whisper server running on http://127.0.0.1:5001")
\ No newline at end of file
+    print("Whisper server running on http://127.0.0.1:5001")
+    serve(app, '0.0.0.0', 5001, workers=WHISPER_WORKERS, on_worker_start=warm_up)  # Note: Using port 5001 instead of 5000
\ No newline at end of file
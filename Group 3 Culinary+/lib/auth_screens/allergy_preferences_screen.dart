@@ -2,6 +2,8 @@
 import 'package:flutter/material.dart';
 import 'package:firebase_auth/firebase_auth.dart';
 import 'package:cloud_firestore/cloud_firestore.dart';
+import 'package:http/http.dart' as http;
+import 'dart:convert';
 import '../screens/video_search_screen.dart';
 
 class AllergyPreferencesScreen extends StatefulWidget {
@@ -44,6 +46,17 @@ class _AllergyPreferencesScreenState extends State<AllergyPreferencesScreen> {
           'allergyPreferencesSet': true,
         });
 
+        // Let the backend compile the profile for allergen screening (best effort)
+        try {
+          await http.post(
+            Uri.parse('http://127.0.0.1:5002/profiles/$userId'),
+            headers: {'Content-Type': 'application/json'},
+            body: jsonEncode({'allergies': selectedAllergies}),
+          );
+        } catch (e) {
+          print('Could not sync allergy profile: $e');
+        }
+
         // Navigate to main screen
         Navigator.of(context).pushReplacement(
           MaterialPageRoute(builder: (context) => VideoSearchScreen()),
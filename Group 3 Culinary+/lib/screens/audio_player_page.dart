@@ -1,4 +1,5 @@
 import 'package:flutter/material.dart';
+import 'dart:async';
 import 'dart:typed_data';
 import 'package:audioplayers/audioplayers.dart';
 import 'package:http/http.dart' as http;
@@ -12,11 +13,14 @@ String? transcriptText;
 class AudioPlayerPage extends StatefulWidget {
   final Uint8List audioBytes;
   final String title;
+  // When set, transcript and ingredients are streamed from the pipeline server during playback
+  final String? youtubeUrl;
   
   const AudioPlayerPage({
     Key? key, 
     required this.audioBytes, 
-    required this.title
+    required this.title,
+    this.youtubeUrl,
   }) : super(key: key);
 
   @override
@@ -47,6 +51,45 @@ Future<String> sendToLocalWhisperAPI(Uint8List audioBytes) async {
   }
 }
 
+// Reads Server-Sent Events from the pipeline server: transcript segments and
+// newly detected ingredients arrive as each audio chunk is processed
+Stream<Map<String, dynamic>> streamPipelineEvents(String youtubeUrl) async* {
+  final client = http.Client();
+  try {
+    final request = http.Request('POST', Uri.parse('http://127.0.0.1:5003/process/stream'));
+    request.headers['Content-Type'] = 'application/json';
+    request.headers['Accept'] = 'text/event-stream';
+    request.body = jsonEncode({'youtube_url': youtubeUrl});
+
+    final response = await client.send(request);
+    if (response.statusCode != 200) {
+      throw Exception('Failed to start processing: ${response.statusCode}');
+    }
+
+    String eventType = 'message';
+    final dataLines = <String>[];
+    final lines = response.stream.transform(utf8.decoder).transform(const LineSplitter());
+    await for (final line in lines) {
+      if (line.isEmpty) {
+        // A blank line ends the event
+        if (dataLines.isNotEmpty) {
+          final event = Map<String, dynamic>.from(jsonDecode(dataLines.join('\n')));
+          event['type'] ??= eventType;
+          yield event;
+        }
+        eventType = 'message';
+        dataLines.clear();
+      } else if (line.startsWith('event:')) {
+        eventType = line.substring(6).trim();
+      } else if (line.startsWith('data:')) {
+        dataLines.add(line.substring(5).trim());
+      }
+    }
+  } finally {
+    client.close();
+  }
+}
+
 Future<List<Map<String, dynamic>>> extractIngredients(String transcript) async {
   try {
     final url = Uri.parse('https://5999-34-142-132-29.ngrok-free.app/extract_ingredients');
@@ -74,11 +117,17 @@ class _AudioPlayerPageState extends State<AudioPlayerPage> {
   bool isPlaying = false;
   Duration duration = Duration.zero;
   Duration position = Duration.zero;
+  StreamSubscription<Map<String, dynamic>>? pipelineSubscription;
+  final ValueNotifier<List<Map<String, dynamic>>> liveIngredients = ValueNotifier([]);
+  final ValueNotifier<bool> pipelineDone = ValueNotifier(false);
   
   @override
   void initState() {
     super.initState();
     setAudio();
+    if (widget.youtubeUrl != null) {
+      startPipelineStream();
+    }
     
     // Listen to audio player state changes
     audioPlayer.onPlayerStateChanged.listen((state) {
@@ -104,10 +153,63 @@ class _AudioPlayerPageState extends State<AudioPlayerPage> {
   
   @override
   void dispose() {
+    pipelineSubscription?.cancel();
+    liveIngredients.dispose();
+    pipelineDone.dispose();
     audioPlayer.dispose();
     super.dispose();
   }
   
+  void startPipelineStream() {
+    transcriptText = null;
+    isProcessing = true;
+    
+    pipelineSubscription = streamPipelineEvents(widget.youtubeUrl!).listen((event) {
+      if (!mounted) return;
+      switch (event['type']) {
+        case 'segment':
+          setState(() {
+            transcriptText = transcriptText == null
+                ? event['text']
+                : '${transcriptText!} ${event['text']}';
+            isProcessing = false;
+          });
+          break;
+        case 'ingredient':
+          liveIngredients.value = [
+            ...liveIngredients.value,
+            {'name': event['name'], 'allergen': event['allergen']},
+          ];
+          break;
+        case 'done':
+          setState(() {
+            transcriptText = event['transcript'];
+            isProcessing = false;
+          });
+          pipelineDone.value = true;
+          break;
+        case 'error':
+          showPipelineError(event['error']);
+          break;
+      }
+    }, onError: (e) {
+      if (mounted) showPipelineError(e);
+    });
+  }
+  
+  void showPipelineError(Object? error) {
+    pipelineDone.value = true;
+    setState(() {
+      isProcessing = false;
+    });
+    ScaffoldMessenger.of(context).showSnackBar(
+      SnackBar(
+        content: Text("Error processing video: $error"),
+        backgroundColor: Colors.red,
+      ),
+    );
+  }
+  
   Future<void> setAudio() async {
     // Load audio from bytes
     await audioPlayer.setSourceBytes(widget.audioBytes);
@@ -258,7 +360,7 @@ class _AudioPlayerPageState extends State<AudioPlayerPage> {
                 ),
                 SizedBox(height: 24),
                 // Buttons area - now always visible
-                if (transcriptText == null)
+                if (transcriptText == null && !isProcessing)
                   ElevatedButton(
                     onPressed: () async {
                       setState(() {
@@ -292,7 +394,13 @@ class _AudioPlayerPageState extends State<AudioPlayerPage> {
                         Navigator.push(
                           context,
                           MaterialPageRoute(
-                            builder: (context) => IngredientsPage(transcript: transcriptText!),
+                            builder: (context) => widget.youtubeUrl != null
+                                ? IngredientsPage(
+                                    transcript: transcriptText!,
+                                    liveIngredients: liveIngredients,
+                                    liveDone: pipelineDone,
+                                  )
+                                : IngredientsPage(transcript: transcriptText!),
                           ),
                         );
                       },
@@ -4,8 +4,16 @@ import 'package:http/http.dart' as http;
 
 class IngredientsPage extends StatefulWidget {
   final String transcript;
+  // Filled in by the audio player while the video is still being processed
+  final ValueNotifier<List<Map<String, dynamic>>>? liveIngredients;
+  final ValueNotifier<bool>? liveDone;
   
-  const IngredientsPage({Key? key, required this.transcript}) : super(key: key);
+  const IngredientsPage({
+    Key? key,
+    required this.transcript,
+    this.liveIngredients,
+    this.liveDone,
+  }) : super(key: key);
 
   @override
   _IngredientsPageState createState() => _IngredientsPageState();
@@ -16,10 +24,35 @@ class _IngredientsPageState extends State<IngredientsPage> {
   List<Map<String, dynamic>> ingredients = [];
   String? errorMessage;
 
+  bool get isLive => widget.liveIngredients != null && widget.liveDone != null;
+
   @override
   void initState() {
     super.initState();
-    _extractIngredients();
+    if (isLive) {
+      ingredients = widget.liveIngredients!.value;
+      isLoading = ingredients.isEmpty && !widget.liveDone!.value;
+      widget.liveIngredients!.addListener(_onLiveUpdate);
+      widget.liveDone!.addListener(_onLiveUpdate);
+    } else {
+      _extractIngredients();
+    }
+  }
+
+  @override
+  void dispose() {
+    if (isLive) {
+      widget.liveIngredients!.removeListener(_onLiveUpdate);
+      widget.liveDone!.removeListener(_onLiveUpdate);
+    }
+    super.dispose();
+  }
+
+  void _onLiveUpdate() {
+    setState(() {
+      ingredients = widget.liveIngredients!.value;
+      isLoading = ingredients.isEmpty && !widget.liveDone!.value;
+    });
   }
 
   Future<void> _extractIngredients() async {
@@ -117,7 +150,9 @@ class _IngredientsPageState extends State<IngredientsPage> {
                     ),
                     SizedBox(height: 6),
                     Text(
-                      'From your transcript:',
+                      isLive && !widget.liveDone!.value
+                          ? 'From your video (still listening...):'
+                          : 'From your transcript:',
                       style: TextStyle(
                         fontSize: 14,
                         color: Colors.grey.shade600,
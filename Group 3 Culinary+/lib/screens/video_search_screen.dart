@@ -146,6 +146,7 @@ class _VideoSearchScreenState extends State<VideoSearchScreen> {
             builder: (context) => AudioPlayerPage(
               audioBytes: audioBytes,
               title: title,
+              youtubeUrl: videoUrl,
             ),
           ),
         );
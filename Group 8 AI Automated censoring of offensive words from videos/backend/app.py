@@ -1,24 +1,64 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, send_from_directory, Response
 import os
+import re
 import time
 import uuid
 import json
+import shutil
 from flask_cors import CORS
-from transcribe import transcribe_audio
-from process_transcript import detect_offensive_words
-from audio_processing import extract_audio, censor_audio, merge_audio_with_video
+import torch
+from transcribe import transcribe_audio, warm_up, MODEL_STATE
+from process_transcript import detect_offensive_words, MODEL_VERSION, LEXICON
+from audio_processing import (extract_audio, censor_audio, render_censored_audio, merge_audio_with_video,
+                              censor_video_ffmpeg, segment_hls, wav_duration)
+from model_host import serve
+from jobs import JobManager
+from intake import receive_upload
+from result_store import ResultStore
+from metrics import job_records, stage_summary
 
 #  Initialize Flask App
 app = Flask(__name__)
-CORS(app)
+#  Lets script-driven players (e.g. hls.js) read the range and caching headers
+CORS(app, expose_headers=["Accept-Ranges", "Content-Range", "Content-Length", "ETag"])
 
 #  Define directories
-UPLOAD_FOLDER = "uploads"
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 PROCESSED_FOLDER = os.path.join(BASE_DIR, "processed")
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(PROCESSED_FOLDER, exist_ok=True)
 
+#  Number of forked workers sharing the preloaded models (POSIX only)
+WORKERS = int(os.environ.get("WORKERS", "1"))
+
+#  "numpy": censor the extracted WAV then remux; "ffmpeg": one filter-graph pass over the video
+CENSOR_ENGINE = os.environ.get("CENSOR_ENGINE", "numpy")
+
+#  Per-upload working directories for intermediate files, keyed by unique_id
+WORKSPACE_FOLDER = os.path.join(PROCESSED_FOLDER, "workspaces")
+#  Seconds a workspace is kept after its last change (the report can be revisited until then)
+WORKSPACE_TTL = int(os.environ.get("WORKSPACE_TTL", str(24 * 3600)))
+os.makedirs(WORKSPACE_FOLDER, exist_ok=True)
+
+#  Background pipeline jobs; each has its own workspace, so several run in parallel
+JOBS = JobManager(os.path.join(PROCESSED_FOLDER, "jobs"), workers=int(os.environ.get("JOB_WORKERS", "4")))
+#  Seconds a download waits for the job producing its file
+DOWNLOAD_WAIT = int(os.environ.get("DOWNLOAD_WAIT", "600"))
+
+#  Also cut censored videos into HLS segments (per request with "hls": true)
+HLS_ENABLED = os.environ.get("HLS_ENABLED", "0") == "1"
+HLS_FOLDER = os.path.join(PROCESSED_FOLDER, "hls")
+os.makedirs(HLS_FOLDER, exist_ok=True)
+HLS_MIMETYPES = {".m3u8": "application/vnd.apple.mpegurl", ".ts": "video/mp2t"}
+
+#  Results of earlier uploads by content hash, so re-uploads skip the whole pipeline
+RESULTS = ResultStore(os.path.join(PROCESSED_FOLDER, "results"),
+                      max_entries=int(os.environ.get("RESULT_STORE_MAX", "500")))
+#  Results are only reused when produced by the same transcription and detection models
+PIPELINE_VERSION = "-".join([
+    MODEL_STATE["backend"], MODEL_STATE["model"], MODEL_STATE["compute_type"],
+    MODEL_VERSION, LEXICON.version if LEXICON else "nolexicon",
+])
+
 #  Paths for JSON Files
 UPDATED_JSON_FILE_PATH = os.path.join(PROCESSED_FOLDER, "censored_words_updated.json")
 
@@ -27,48 +67,117 @@ def log_request():
     print("\n🔹 Received Request at:", request.path)
     print("🔹 Request Method:", request.method)
     print("🔹 Request Headers:", request.headers)
-    print("🔹 Request Files:", request.files.keys())
-
-@app.route("/upload", methods=["POST"])
-def upload_video():
-    """Handles file upload, transcription, and offensive word detection"""
-    log_request()
-
-    #  Ensure a file was uploaded
-    if "file" not in request.files:
-        return jsonify({"error": "No file uploaded"}), 400
-
-    file = request.files["file"]
-    original_filename, original_ext = os.path.splitext(file.filename)
-    unique_id = uuid.uuid4().hex[:8]  # Generate a unique ID for processing
-
-    video_path = os.path.join(UPLOAD_FOLDER, file.filename)
-    file.save(video_path)  #  Save uploaded file
-    print(f" Video File saved at: {video_path}")
-
-    #  Generate a unique filename for extracted audio
-    extracted_audio_filename = f"{original_filename}_{unique_id}.wav"
-    extracted_audio_path = os.path.join(PROCESSED_FOLDER, extracted_audio_filename)
+    #  Not request.files: that would buffer the whole upload before /upload can stream it
+    print("🔹 Request Content:", request.mimetype, request.content_length)
+
+def workspace_dir(unique_id):
+    """Working directory of one upload, None for IDs we did not issue"""
+    if not unique_id or not re.fullmatch(r"[0-9a-f]{8}", unique_id):
+        return None
+    return os.path.join(WORKSPACE_FOLDER, unique_id)
+
+def remove_workspace(unique_id):
+    path = workspace_dir(unique_id)
+    if path and os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+        print(f" Removed workspace: {path}")
+
+def cleanup_workspaces():
+    """Removes workspaces untouched for longer than WORKSPACE_TTL"""
+    cutoff = time.time() - WORKSPACE_TTL
+    for unique_id in os.listdir(WORKSPACE_FOLDER):
+        path = os.path.join(WORKSPACE_FOLDER, unique_id)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                remove_workspace(unique_id)
+        except OSError:
+            pass
+
+def job_response(job):
+    """202 with the job's URLs, or with ?wait=1 the finished result as before"""
+    if request.args.get("wait") == "1":
+        snapshot = JOBS.wait_done(job.id)
+        if snapshot["state"] == "error":
+            return jsonify({"error": snapshot["error"], "job_id": job.id}), 500
+        return jsonify(dict(snapshot["result"], job_id=job.id))
+
+    return jsonify({
+        "job_id": job.id,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events",
+    }), 202
+
+def run_upload(job, video_path, extracted_audio_path, unique_id, extractor=None, sha256=None):
+    """Upload job: extract audio, transcribe, detect offensive words"""
+    workspace = workspace_dir(unique_id)
+    try:
+        return _run_upload(job, workspace, video_path, extracted_audio_path, unique_id, extractor, sha256)
+    except Exception:
+        remove_workspace(unique_id)
+        raise
+
+def run_reuse(job, video_path, extracted_audio_path, unique_id, stored):
+    """Re-upload job: restores an earlier upload's transcript and detections into this workspace"""
+    job.stage("reuse")
+    workspace = workspace_dir(unique_id)
+
+    #  The same files the pipeline would have written, so undo and censoring work as usual
+    with open(os.path.join(workspace, "output.json"), "w", encoding="utf-8") as f:
+        json.dump(stored["word_timestamps"], f, indent=2)
+    transcript_json = os.path.join(workspace, "offensive_words.json")
+    with open(transcript_json, "w", encoding="utf-8") as f:
+        json.dump({"censored_text": stored["censored_text"], "offensive_words": stored["offensive_words"]}, f, indent=2)
+
+    print(f" Reused results of an identical earlier upload for {video_path}")
+    return {
+        "original_text": stored["original_text"],
+        "censored_text": stored["censored_text"],
+        "censored_words": stored["offensive_words"],
+        "contains_offensive_words": len(stored["offensive_words"]) > 0,
+        "video_path": video_path,
+        #  Not extracted yet; the censor job extracts it if its engine needs it
+        "audio_path": extracted_audio_path,
+        "transcript_json": transcript_json,
+        "unique_id": unique_id,
+        "stats": dict(stored["stats"], reused=True),
+        "reused": True,
+    }
 
-    #  Step 1: Extract Audio from Video
-    audio_path = extract_audio(video_path, extracted_audio_path)
+def _run_upload(job, workspace, video_path, extracted_audio_path, unique_id, extractor, sha256):
+    #  Step 1: Extract Audio from Video (usually already done while the upload streamed in)
+    job.stage("extract")
+    audio_path = extractor.wait() if extractor else None
+    if not audio_path:
+        audio_path = extract_audio(video_path, extracted_audio_path)
     if not audio_path:
-        return jsonify({"error": "Failed to extract audio"}), 500
+        raise RuntimeError("Failed to extract audio")
+    job.media_seconds = wav_duration(audio_path)
 
     #  Step 2: Transcribe the Extracted Audio
-    transcript_output = transcribe_audio(audio_path)
+    job.stage("transcribe")
+    transcript_output = transcribe_audio(audio_path, output_dir=workspace)
     transcript_text = transcript_output["original_text"]
     word_timestamps = transcript_output["word_timestamps"]
 
     #  Step 3: Detect Offensive Words
-    offensive_words_output = detect_offensive_words(transcript_text, word_timestamps)
+    job.stage("classify")
+    offensive_words_output = detect_offensive_words(transcript_text, word_timestamps, output_dir=workspace)
     transcript_json = offensive_words_output["output_json"]
 
     #  Step 4: Check if Offensive Words are Found
-    contains_offensive_words = len(offensive_words_output["offensive_words"]) > 0  
+    contains_offensive_words = len(offensive_words_output["offensive_words"]) > 0
+
+    if sha256:
+        RESULTS.put(sha256, PIPELINE_VERSION, {
+            "original_text": transcript_text,
+            "word_timestamps": word_timestamps,
+            "censored_text": offensive_words_output["censored_text"],
+            "offensive_words": offensive_words_output["offensive_words"],
+            "stats": offensive_words_output["stats"],
+        })
 
     #  Prepare Response (Without Censoring Yet)
-    response = {
+    return {
         "original_text": transcript_text,
         "censored_text": offensive_words_output["censored_text"],
         "censored_words": offensive_words_output["offensive_words"],
@@ -76,35 +185,204 @@ def upload_video():
         "video_path": video_path,
         "audio_path": audio_path,
         "transcript_json": transcript_json,
-        "unique_id": unique_id
+        "unique_id": unique_id,
+        "stats": offensive_words_output["stats"]
     }
 
-    return jsonify(response)
+@app.route("/upload", methods=["POST"])
+def upload_video():
+    """
+    Streams the upload to disk and into ffmpeg at the same time, then queues
+    transcription and offensive word detection.
+
+    Takes multipart/form-data with a "file" part, or the raw video as the body
+    with its name in ?filename= / X-Filename.
+    """
+    log_request()
+
+    unique_id = uuid.uuid4().hex[:8]  # Generate a unique ID for processing
+
+    #  Everything this upload produces before censoring lives in its own workspace
+    cleanup_workspaces()
+    workspace = workspace_dir(unique_id)
+    os.makedirs(workspace, exist_ok=True)
+
+    #  Audio extraction runs while the upload is still arriving
+    extracted_audio_path = os.path.join(workspace, f"{unique_id}.wav")
+    try:
+        received = receive_upload(
+            request.stream, request.mimetype, request.mimetype_params, workspace, extracted_audio_path,
+            filename=request.args.get("filename") or request.headers.get("X-Filename"),
+        )
+    except ValueError as e:
+        print(f" ERROR: {e}")
+        remove_workspace(unique_id)
+        return jsonify({"error": str(e)}), 400
+
+    #  Ensure a file was uploaded
+    if not received:
+        remove_workspace(unique_id)
+        return jsonify({"error": "No file uploaded"}), 400
+
+    video_path, _, extractor, sha256 = received
+    print(f" Video File saved at: {video_path} (sha256 {sha256[:12]})")
+
+    #  Same bytes through the same models: skip ffmpeg, Whisper and the classifier
+    stored = RESULTS.get(sha256, PIPELINE_VERSION)
+    if stored is not None:
+        extractor.abort()
+        job = JOBS.submit(
+            "upload", ["reuse"],
+            lambda job: run_reuse(job, video_path, extracted_audio_path, unique_id, stored),
+        )
+        return job_response(job)
+
+    job = JOBS.submit(
+        "upload", ["extract", "transcribe", "classify"],
+        lambda job: run_upload(job, video_path, extracted_audio_path, unique_id, extractor, sha256),
+    )
+    return job_response(job)
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    """Current state, stage progress and (once done) result of a job"""
+    snapshot = JOBS.get(job_id)
+    if snapshot is None:
+        return jsonify({"error": f"Job {job_id} not found"}), 404
+    return jsonify(snapshot)
+
+@app.route("/jobs/<job_id>/events")
+def job_events(job_id):
+    """Server-sent events with a job snapshot on every change, until it finishes"""
+    if JOBS.get(job_id) is None:
+        return jsonify({"error": f"Job {job_id} not found"}), 404
+
+    def stream():
+        version = -1
+        while True:
+            snapshot = JOBS.wait(job_id, version)
+            if snapshot is None:
+                return
+            if snapshot["version"] != version:
+                version = snapshot["version"]
+                yield f"data: {json.dumps(snapshot)}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+            if snapshot["state"] in ("done", "error"):
+                return
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 #  File Download Route
 @app.route("/download/<filename>")
 def download_file(filename):
-    """Allows users to download processed files"""
+    """
+    Allows users to download processed files, waiting for the job that writes them.
+    Supports Range and If-None-Match, so players can seek without re-downloading;
+    ?inline=1 serves the file for in-page preview instead of as an attachment.
+    """
+    filename = os.path.basename(filename)
     file_path = os.path.join(PROCESSED_FOLDER, filename)
 
     print(f"🔹 Download requested: {file_path}")
 
-    for _ in range(10):
-        if os.path.exists(file_path):
-            print(f" Serving file: {file_path}")
-            return send_file(file_path, as_attachment=True)
-        print(" Waiting for file to be available...")
-        time.sleep(1)
+    if not os.path.exists(file_path):
+        pending = JOBS.find_output(filename)
+        if pending:
+            print(f" Waiting for job {pending['job_id']} to finish...")
+            JOBS.wait_done(pending["job_id"], timeout=DOWNLOAD_WAIT)
+
+    if os.path.exists(file_path):
+        print(f" Serving file: {file_path}")
+        #  max_age=0: re-censoring rewrites the same filename, so clients revalidate by ETag
+        return send_file(file_path, as_attachment=request.args.get("inline") != "1",
+                         conditional=True, etag=True, max_age=0)
 
     print(f" ERROR: File not found - {filename}")
     return jsonify({"error": f"File {filename} not found"}), 404
 
+@app.route("/hls/<name>/<segment>")
+def hls_file(name, segment):
+    """HLS playlist and segments of a censored video"""
+    name = os.path.basename(name)
+    if not os.path.exists(os.path.join(HLS_FOLDER, name, "index.m3u8")):
+        pending = JOBS.find_output(f"hls/{name}")
+        if pending:
+            JOBS.wait_done(pending["job_id"], timeout=DOWNLOAD_WAIT)
+
+    mimetype = HLS_MIMETYPES.get(os.path.splitext(segment)[1])
+    if not mimetype:
+        return jsonify({"error": "Not an HLS file"}), 404
+    #  send_from_directory rejects paths that escape the playlist's folder
+    return send_from_directory(os.path.join(HLS_FOLDER, name), segment, mimetype=mimetype,
+                               conditional=True, etag=True, max_age=0)
+
 from flask_cors import cross_origin
 
+def run_censor(job, engine, unique_id, video_path, audio_path, transcript_json,
+               censored_audio_filename, censored_video_filename, hls_name=None):
+    """Censor job: beep the audio and produce the censored video"""
+    censored_video_path = os.path.join(PROCESSED_FOLDER, censored_video_filename)
+    render = {"mode": "full"}
+    if audio_path and os.path.exists(audio_path):
+        job.media_seconds = wav_duration(audio_path)
+
+    if engine == "ffmpeg":
+        #  Mute, beep and encode in one ffmpeg run straight from the uploaded video
+        job.stage("censor")
+        censored_video_path = censor_video_ffmpeg(video_path, transcript_json, censored_video_path)
+        if not censored_video_path:
+            raise RuntimeError("Failed to create censored video")
+    else:
+        #  Step 1: Censor the Audio
+        job.stage("censor")
+        if not os.path.exists(audio_path):
+            #  Uploads answered from the result store skipped extraction
+            if not extract_audio(video_path, audio_path):
+                raise RuntimeError("Failed to extract audio")
+            job.media_seconds = wav_duration(audio_path)
+        censored_audio_path = os.path.join(PROCESSED_FOLDER, censored_audio_filename)
+        workspace = workspace_dir(unique_id)
+        if workspace and os.path.isdir(workspace):
+            #  After reviewer edits only the changed word regions of the last render are patched
+            censored_audio_path, render = render_censored_audio(
+                audio_path, transcript_json, censored_audio_path, os.path.join(workspace, "render.json"))
+        else:
+            censored_audio_path = censor_audio(audio_path, transcript_json, censored_audio_path)
+        if not censored_audio_path:
+            raise RuntimeError("Failed to create censored audio")
+
+        #  Step 2: Merge Censored Audio with Video
+        job.stage("merge")
+        censored_video_path = merge_audio_with_video(video_path, censored_audio_path, censored_video_path)
+        if not censored_video_path:
+            raise RuntimeError("Failed to create censored video")
+
+    print(f" Censored Video Ready: {censored_video_path}")
+
+    hls_playlist = None
+    if hls_name:
+        #  Optional: a failed segmenting still leaves the MP4 to download
+        job.stage("package")
+        if segment_hls(censored_video_path, os.path.join(HLS_FOLDER, hls_name)):
+            hls_playlist = f"http://127.0.0.1:5000/hls/{hls_name}/index.m3u8"
+
+    #  Send Response with Download Link
+    return {
+        "censored_audio": f"http://127.0.0.1:5000/download/{censored_audio_filename}" if censored_audio_filename else None,
+        "censored_video": f"http://127.0.0.1:5000/download/{censored_video_filename}",
+        "hls_playlist": hls_playlist,
+        "engine": engine,
+        "render": render,
+        "unique_id": unique_id,
+        "message": "Censorship and merging completed successfully!"
+    }
+
 @app.route("/censor_and_merge", methods=["POST", "OPTIONS"])
 @cross_origin(origin='*', headers=['Content-Type', 'Authorization'])
 def censor_and_merge():
-    """Censors the audio and merges it with video only when requested"""
+    """Queues censoring the audio and merging it with video only when requested"""
     
     #  Handle Preflight OPTIONS Request for CORS
     if request.method == "OPTIONS":
@@ -121,67 +399,54 @@ def censor_and_merge():
     transcript_json = data.get("transcript_json")
     unique_id = data.get("unique_id")
 
-    if not video_path or not audio_path or not transcript_json:
+    engine = data.get("engine", CENSOR_ENGINE)
+    if engine not in ("numpy", "ffmpeg"):
+        return jsonify({"error": f"Unknown censor engine: {engine}"}), 400
+
+    if not video_path or not transcript_json or (engine == "numpy" and not audio_path):
         return jsonify({"error": "Missing required data"}), 400
 
     original_filename, _ = os.path.splitext(os.path.basename(video_path))
-
-    #  Step 1: Censor the Audio
-    censored_audio_filename = f"{original_filename}_{unique_id}_censored.wav"
-    censored_audio_path = os.path.join(PROCESSED_FOLDER, censored_audio_filename)
-
-    censored_audio_path = censor_audio(audio_path, transcript_json, censored_audio_path)
-    if not os.path.exists(censored_audio_path):
-        return jsonify({"error": "Failed to create censored audio"}), 500
-
-    #  Step 2: Merge Censored Audio with Video
     censored_video_filename = f"{original_filename}_{unique_id}_censored.mp4"
-    censored_video_path = os.path.join(PROCESSED_FOLDER, censored_video_filename)
-
-    censored_video_path = merge_audio_with_video(video_path, censored_audio_path, censored_video_path)
-    if not os.path.exists(censored_video_path):
-        return jsonify({"error": "Failed to create censored video"}), 500
-
-    print(f" Censored Video Ready: {censored_video_path}")
-
-    #  Send Response with Download Link
-    response = {
-        "censored_audio": f"http://127.0.0.1:5000/download/{censored_audio_filename}",
-        "censored_video": f"http://127.0.0.1:5000/download/{censored_video_filename}",
-        "message": "Censorship and merging completed successfully!"
-    }
-
-    return jsonify(response)
+    censored_audio_filename = None if engine == "ffmpeg" else f"{original_filename}_{unique_id}_censored.wav"
+    hls_name = f"{original_filename}_{unique_id}" if data.get("hls", HLS_ENABLED) else None
+
+    stages = ["censor"] if engine == "ffmpeg" else ["censor", "merge"]
+    if hls_name:
+        stages.append("package")
+    job = JOBS.submit(
+        "censor", stages,
+        lambda job: run_censor(job, engine, unique_id, video_path, audio_path, transcript_json,
+                               censored_audio_filename, censored_video_filename, hls_name),
+        outputs=[name for name in (censored_audio_filename, censored_video_filename) if name]
+                + ([f"hls/{hls_name}"] if hls_name else []),
+    )
+    return job_response(job)
 
 
 @app.route("/save_updated_json", methods=["POST"])
 def save_updated_json():
-    """Deletes the existing offensive_words.json file and saves a new one without the undone word."""
+    """Replaces the upload's offensive_words.json with the list left after undoing words."""
     data = request.json
-    OFFENSIVE_WORDS_JSON_PATH = os.path.join(PROCESSED_FOLDER, "offensive_words.json")
-
 
     if "censored_words" not in data:
         return jsonify({"error": "No censored words provided"}), 400
 
-    #  Ensure processed folder exists
-    os.makedirs(PROCESSED_FOLDER, exist_ok=True)
-
-    #  Delete the old offensive_words.json file if it exists
-    if os.path.exists(OFFENSIVE_WORDS_JSON_PATH):
-        try:
-            os.remove(OFFENSIVE_WORDS_JSON_PATH)
-            print(f" Deleted old JSON file: {OFFENSIVE_WORDS_JSON_PATH}")
-        except Exception as e:
-            print(f" Error deleting old JSON file: {e}")
-            return jsonify({"error": "Failed to delete old JSON file"}), 500
+    #  Each upload has its own copy, so concurrent reviews don't overwrite each other
+    workspace = workspace_dir(data.get("unique_id"))
+    if not workspace or not os.path.isdir(workspace):
+        return jsonify({"error": "Unknown or expired upload"}), 404
+    OFFENSIVE_WORDS_JSON_PATH = os.path.join(workspace, "offensive_words.json")
 
     #  Save a new JSON file, renaming "censored_words" to "offensive_words"
     try:
         updated_data = {"offensive_words": data["censored_words"]}  #  Fix key name
 
-        with open(OFFENSIVE_WORDS_JSON_PATH, "w", encoding="utf-8") as f:
+        #  Written to a temp file and swapped in, so a running censor job never sees half a file
+        tmp_path = f"{OFFENSIVE_WORDS_JSON_PATH}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
             json.dump(updated_data, f, indent=2)
+        os.replace(tmp_path, OFFENSIVE_WORDS_JSON_PATH)
         
         print(f" New JSON file saved at: {OFFENSIVE_WORDS_JSON_PATH}")
         return jsonify({"message": "Updated JSON saved successfully", "file": OFFENSIVE_WORDS_JSON_PATH})
@@ -190,7 +455,49 @@ def save_updated_json():
         print(f" Error saving JSON: {e}")
         return jsonify({"error": "Failed to save updated JSON"}), 500
 
-    
+
+@app.route("/workspace/<unique_id>", methods=["DELETE"])
+def delete_workspace(unique_id):
+    """Drops an upload's intermediate files once the user is done with it"""
+    if not workspace_dir(unique_id):
+        return jsonify({"error": "Invalid upload ID"}), 400
+    remove_workspace(unique_id)
+    return jsonify({"message": f"Workspace {unique_id} removed"})
+
+@app.route("/metrics")
+def metrics():
+    """Per-stage timings and throughput over the jobs still on record (all workers)"""
+    snapshots = list(JOBS.snapshots())
+    states = {}
+    for snapshot in snapshots:
+        states[snapshot["state"]] = states.get(snapshot["state"], 0) + 1
+
+    records = [record for snapshot in snapshots if snapshot["state"] == "done"
+               for record in job_records(snapshot)]
+    return jsonify({
+        "jobs": states,
+        "stages": stage_summary(records),
+        "pipeline_version": PIPELINE_VERSION,
+        "model": MODEL_STATE,
+    })
+
+@app.route("/ready")
+def ready():
+    """Readiness probe: 200 once Whisper is loaded and warmed up in this worker"""
+    state = dict(MODEL_STATE, pid=os.getpid(), workers=WORKERS)
+    return jsonify(state), 200 if state["ready"] else 503
+
+def start_worker():
+    """Per-worker setup before accepting requests"""
+    #  Split the cores between workers instead of oversubscribing them
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // WORKERS))
+    warm_up()
+
 #  Run Flask App
 if __name__ == "__main__":
-    app.run(debug=True)
+    if WORKERS > 1:
+        #  Models are loaded once above and shared copy-on-write by the forked workers
+        serve(app, "127.0.0.1", 5000, workers=WORKERS, on_worker_start=start_worker)
+    else:
+        warm_up()
+        app.run(debug=True)
@@ -1,14 +1,28 @@
 import os
 import json
+import wave
+import shutil
+import struct
 import ffmpeg
+import tempfile
+import threading
 import subprocess
-from pydub import AudioSegment
-from pydub.generators import Sine
+import numpy as np
+
+BEEP_FREQUENCY = 1000
+BEEP_PAD_BEFORE = 0.05   #  seconds of buffer before each word
+BEEP_PAD_AFTER = 0.25    #  and after it
+FADE_SECONDS = 0.005     #  ramps at the edges of a beep so they don't click
+#  WAVs larger than this are censored through a memory map instead of in RAM
+MMAP_THRESHOLD = int(os.environ.get("CENSOR_MMAP_MB", "64")) * 1024 * 1024
+#  Moves the MP4 index (moov atom) to the front so players can start before the whole file is fetched
+FASTSTART = ["-movflags", "+faststart"]
+HLS_SEGMENT_SECONDS = int(os.environ.get("HLS_SEGMENT_SECONDS", "6"))
 
 def extract_audio(video_path, output_audio):
     """Extracts audio from a video file using FFmpeg"""
     try:
-        os.makedirs("processed", exist_ok=True)
+        os.makedirs(os.path.dirname(output_audio) or ".", exist_ok=True)
         ffmpeg.input(video_path).output(output_audio, format='wav', acodec='pcm_s16le', ar='16000').run(overwrite_output=True)
         print(f" Audio extracted to: {output_audio}")
         return output_audio
@@ -16,56 +30,225 @@ def extract_audio(video_path, output_audio):
         print(f" Error extracting audio: {e}")
         return None
 
-def generate_beep(duration=500):
-    """Generate a beep sound"""
-    beep_path = "static/beep.wav"  #  Use WAV instead of MP3 for compatibility
-    if not os.path.exists(beep_path):
-        os.makedirs("static", exist_ok=True)
-        beep = Sine(1000).to_audio_segment(duration=duration)
-        beep.export(beep_path, format="wav")  #  Save as WAV instead of MP3
-    return beep_path
+def _wav_layout(path):
+    """(channels, sample_rate, sample_width, data_offset, data_size) of a PCM WAV"""
+    with open(path, "rb") as f:
+        riff, _, fmt = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or fmt != b"WAVE":
+            raise ValueError(f"{path} is not a WAV file")
+        channels = sample_rate = sample_width = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt_chunk = f.read(chunk_size)
+                _, channels, sample_rate, _, _, bits = struct.unpack("<HHIIHH", fmt_chunk[:16])
+                sample_width = bits // 8
+                f.seek(chunk_size % 2, 1)
+            elif chunk_id == b"data":
+                data_size = min(chunk_size, os.path.getsize(path) - f.tell())
+                return channels, sample_rate, sample_width, f.tell(), data_size
+            else:
+                f.seek(chunk_size + chunk_size % 2, 1)
+
+def wav_duration(path):
+    """Length of a PCM WAV in seconds, None if it can't be read"""
+    try:
+        channels, sample_rate, sample_width, _, size = _wav_layout(path)
+    except (OSError, ValueError, struct.error):
+        return None
+    return size / (channels * sample_width * sample_rate)
+
+def beep_regions(offensive_words, duration):
+    """Padded (start, end) times of the offensive words, sorted with overlaps merged"""
+    regions = []
+    for start, end in sorted((w["start_time"], w["end_time"]) for w in offensive_words):
+        start = max(0.0, start - BEEP_PAD_BEFORE)
+        end = min(duration, end + BEEP_PAD_AFTER)
+        if end <= start:
+            continue
+        if regions and start <= regions[-1][1]:
+            regions[-1][1] = max(regions[-1][1], end)
+        else:
+            regions.append([start, end])
+    return regions
+
+def apply_beeps(samples, sample_rate, regions, frequency=BEEP_FREQUENCY):
+    """Overwrite each region of an int16 (frames, channels) array with a faded sine, in place"""
+    fade = max(1, int(FADE_SECONDS * sample_rate))
+    peak = np.iinfo(np.int16).max
+    for start, end in regions:
+        a, b = int(start * sample_rate), min(len(samples), int(end * sample_rate))
+        n = b - a
+        if n <= 0:
+            continue
+        tone = np.sin(2 * np.pi * frequency * np.arange(n, dtype=np.float32) / sample_rate)
+        ramp = min(fade, n // 2)
+        if ramp:
+            envelope = np.linspace(0.0, 1.0, ramp, dtype=np.float32)
+            tone[:ramp] *= envelope
+            tone[n - ramp:] *= envelope[::-1]
+        samples[a:b] = (tone * peak).astype(np.int16)[:, None]
+
+def _partial_path(output_path):
+    """Where an output is written before it is swapped in, so downloads never see half a file"""
+    return f"{output_path}.{os.getpid()}.{threading.get_ident()}.part"
 
 def censor_audio(original_audio_path, transcript_json, output_audio_path):
     """Mutes and replaces offensive words with beeps in the audio"""
     print(f"🔹 Censoring Audio: {original_audio_path}")
 
-    audio = AudioSegment.from_wav(original_audio_path)
-    beep = AudioSegment.from_file(generate_beep())
-
     with open(transcript_json, "r", encoding="utf-8") as f:
         offensive_data = json.load(f)
 
-    beep_positions = [(word["start_time"] * 1000, word["end_time"] * 1000) for word in offensive_data["offensive_words"]]
+    channels, sample_rate, sample_width, offset, size = _wav_layout(original_audio_path)
+    if sample_width != 2:
+        raise ValueError(f"Expected 16-bit PCM audio, got {8 * sample_width}-bit")
+    frames = size // (2 * channels)
+    regions = beep_regions(offensive_data["offensive_words"], frames / sample_rate)
 
-    for start_time, end_time in beep_positions:
-        start_time = max(0, int(start_time) - 50)  # Add buffer
-        end_time = min(len(audio), int(end_time) + 250)
-        duration = end_time - start_time
+    print(f" Saving Censored Audio at: {output_audio_path}")
+    partial_path = _partial_path(output_audio_path)
+    try:
+        if size > MMAP_THRESHOLD:
+            #  Copy the file once and patch the beep regions directly in the copy
+            shutil.copyfile(original_audio_path, partial_path)
+            samples = np.memmap(partial_path, dtype="<i2", mode="r+", offset=offset, shape=(frames, channels))
+            apply_beeps(samples, sample_rate, regions)
+            samples.flush()
+            del samples
+        else:
+            samples = np.fromfile(original_audio_path, dtype="<i2", count=frames * channels, offset=offset)
+            samples = samples.reshape(frames, channels)
+            apply_beeps(samples, sample_rate, regions)
+            with wave.open(partial_path, "wb") as out:
+                out.setnchannels(channels)
+                out.setsampwidth(2)
+                out.setframerate(sample_rate)
+                out.writeframes(samples.tobytes())
+        os.replace(partial_path, output_audio_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
 
-        silence = AudioSegment.silent(duration=duration)
-        beep_sound = beep[:duration] if len(beep) > duration else beep
+    return output_audio_path if os.path.exists(output_audio_path) else None
 
-        audio = audio[:start_time] + silence + audio[end_time:]
-        audio = audio.overlay(beep_sound, position=start_time)
+def _publish(buffer_path, output_audio_path):
+    """Copies a finished render over the served file in one atomic swap"""
+    partial_path = _partial_path(output_audio_path)
+    try:
+        shutil.copyfile(buffer_path, partial_path)
+        os.replace(partial_path, output_audio_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    return output_audio_path
 
-    print(f" Saving Censored Audio at: {output_audio_path}")
-    audio.export(output_audio_path, format="wav")
+#  One re-render at a time per render buffer
+_render_locks = {}
+_render_locks_guard = threading.Lock()
 
-    return output_audio_path if os.path.exists(output_audio_path) else None
+def _render_lock(path):
+    with _render_locks_guard:
+        return _render_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+def _load_render_state(state_path, original_audio_path, output_audio_path):
+    """The previous render's regions, if it was made from this source into this buffer"""
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        source = os.stat(original_audio_path)
+    except (OSError, ValueError):
+        return None
+    if (state.get("source") != os.path.abspath(original_audio_path)
+            or state.get("source_size") != source.st_size
+            or state.get("source_mtime_ns") != source.st_mtime_ns
+            or state.get("output") != os.path.abspath(output_audio_path)
+            or not os.path.exists(output_audio_path)
+            or _wav_layout(output_audio_path)[4] != _wav_layout(original_audio_path)[4]):
+        return None
+    return state
+
+def _save_render_state(state_path, original_audio_path, output_audio_path, regions):
+    source = os.stat(original_audio_path)
+    state = {
+        "source": os.path.abspath(original_audio_path),
+        "source_size": source.st_size,
+        "source_mtime_ns": source.st_mtime_ns,
+        "output": os.path.abspath(output_audio_path),
+        "regions": regions,
+    }
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+def render_censored_audio(original_audio_path, transcript_json, output_audio_path, state_path):
+    """
+    Censors the audio like censor_audio, but keeps a private copy of the rendered WAV
+    (render.wav next to state_path) and its beep regions (in state_path) so a later
+    call after reviewer edits only patches what changed: removed regions get their
+    original samples back, added ones are beeped. The patched buffer is then copied
+    and swapped into output_audio_path, which may be being downloaded meanwhile.
+    Returns (path, info).
+    """
+    buffer_path = os.path.join(os.path.dirname(state_path), "render.wav")
+    with _render_lock(buffer_path):
+        with open(transcript_json, "r", encoding="utf-8") as f:
+            offensive_words = json.load(f)["offensive_words"]
+
+        channels, sample_rate, sample_width, offset, size = _wav_layout(original_audio_path)
+        frames = size // (2 * channels)
+        regions = beep_regions(offensive_words, frames / sample_rate)
+
+        state = _load_render_state(state_path, original_audio_path, buffer_path)
+        if state is None:
+            censor_audio(original_audio_path, transcript_json, buffer_path)
+            _save_render_state(state_path, original_audio_path, buffer_path, regions)
+            return _publish(buffer_path, output_audio_path), {"mode": "full", "regions": len(regions)}
+
+        previous = set(map(tuple, state["regions"]))
+        current = set(map(tuple, regions))
+        removed = sorted(previous - current)
+        added = sorted(current - previous)
+        print(f"🔹 Re-censoring {output_audio_path}: {len(removed)} regions removed, {len(added)} added")
+
+        if removed or added:
+            out_offset = _wav_layout(buffer_path)[3]
+            original = np.memmap(original_audio_path, dtype="<i2", mode="r", offset=offset, shape=(frames, channels))
+            censored = np.memmap(buffer_path, dtype="<i2", mode="r+", offset=out_offset, shape=(frames, channels))
+            #  Restore first, then beep, so a new region overlapping a removed one stays beeped
+            for start, end in removed:
+                a, b = int(start * sample_rate), min(frames, int(end * sample_rate))
+                censored[a:b] = original[a:b]
+            apply_beeps(censored, sample_rate, added)
+            censored.flush()
+            del censored, original
+
+        _save_render_state(state_path, original_audio_path, buffer_path, regions)
+        patched = sum(end - start for start, end in removed + added)
+        return _publish(buffer_path, output_audio_path), {
+            "mode": "incremental", "regions": len(regions),
+            "removed": len(removed), "added": len(added), "patched_seconds": round(patched, 2),
+        }
 
 def merge_audio_with_video(video_path, audio_path, output_video_path):
     """Merges censored audio with video using FFmpeg"""
     print(f"🔹 Merging Audio & Video: {video_path} + {audio_path}")
 
+    partial_path = _partial_path(output_video_path)
     try:
         command = [
             "ffmpeg", "-i", video_path, "-i", audio_path, 
             "-c:v", "copy", "-c:a", "aac", "-b:a", "192k",
             "-map", "0:v:0", "-map", "1:a:0", 
-            "-y", output_video_path
+            *FASTSTART, "-f", "mp4", "-y", partial_path
         ]
 
         subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        os.replace(partial_path, output_video_path)
 
         print(f" Merged video saved at: {output_video_path}")
 
@@ -74,3 +257,88 @@ def merge_audio_with_video(video_path, audio_path, output_video_path):
     except subprocess.CalledProcessError as e:
         print(f" FFmpeg Error: {e.stderr.decode()}")
         return None
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+def _between(regions):
+    return "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in regions)
+
+def censor_video_ffmpeg(video_path, transcript_json, output_video_path, frequency=BEEP_FREQUENCY):
+    """
+    Censors the video's audio track in a single ffmpeg run, without decoding to Python.
+
+    The offensive-word intervals become one filter graph: the original audio is muted
+    with volume=0 inside the intervals, and a sine source that is silent outside them
+    is mixed back in. The video stream is copied, only the audio is re-encoded.
+    """
+    print(f"🔹 Censoring Video with ffmpeg: {video_path}")
+
+    with open(transcript_json, "r", encoding="utf-8") as f:
+        offensive_data = json.load(f)
+    regions = beep_regions(offensive_data["offensive_words"], float("inf"))
+
+    command = ["ffmpeg", "-i", video_path]
+    script_path = None
+    if regions:
+        inside = _between(regions)
+        graph = (
+            f"[0:a:0]volume=volume=0:enable='{inside}'[muted];"
+            f"sine=frequency={frequency}:sample_rate=48000,"
+            f"volume=volume=0:enable='not({inside})'[beep];"
+            f"[muted][beep]amix=inputs=2:duration=first:normalize=0[aout]"
+        )
+        #  Long videos give long expressions, so pass the graph as a file
+        #  rather than risk the command-line length limit
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as script:
+            script.write(graph)
+            script_path = script.name
+        command += ["-filter_complex_script", script_path, "-map", "0:v:0", "-map", "[aout]"]
+    else:
+        command += ["-map", "0:v:0", "-map", "0:a:0"]
+
+    partial_path = _partial_path(output_video_path)
+    command += ["-c:v", "copy", "-c:a", "aac", "-b:a", "192k", *FASTSTART, "-f", "mp4", "-y", partial_path]
+
+    try:
+        subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        os.replace(partial_path, output_video_path)
+        print(f" Censored video saved at: {output_video_path}")
+        return output_video_path if os.path.exists(output_video_path) else None
+    except subprocess.CalledProcessError as e:
+        print(f" FFmpeg Error: {e.stderr.decode()}")
+        return None
+    finally:
+        if script_path:
+            os.remove(script_path)
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+def segment_hls(video_path, output_dir, segment_seconds=HLS_SEGMENT_SECONDS):
+    """
+    Cuts a censored MP4 into an HLS VOD playlist (output_dir/index.m3u8 plus
+    segment_NNNN.ts) without re-encoding. Segments start on keyframes, so their
+    length only approximates segment_seconds.
+    """
+    print(f"🔹 Segmenting for HLS: {video_path}")
+    #  Built next to the target and swapped in, so players never load a half-written playlist
+    partial_dir = _partial_path(output_dir)
+    os.makedirs(partial_dir)
+    command = [
+        "ffmpeg", "-i", video_path, "-map", "0:v:0", "-map", "0:a:0", "-c", "copy",
+        "-f", "hls", "-hls_time", str(segment_seconds), "-hls_playlist_type", "vod",
+        "-hls_segment_filename", os.path.join(partial_dir, "segment_%04d.ts"),
+        "-y", os.path.join(partial_dir, "index.m3u8"),
+    ]
+
+    try:
+        subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        shutil.rmtree(output_dir, ignore_errors=True)
+        os.replace(partial_dir, output_dir)
+        print(f" HLS playlist saved at: {os.path.join(output_dir, 'index.m3u8')}")
+        return os.path.join(output_dir, "index.m3u8")
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f" HLS segmenting failed: {e.stderr.decode() if getattr(e, 'stderr', None) else e}")
+        return None
+    finally:
+        shutil.rmtree(partial_dir, ignore_errors=True)
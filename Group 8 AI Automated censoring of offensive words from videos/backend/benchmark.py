@@ -0,0 +1,119 @@
+"""
+Benchmark of the censoring pipeline, stage by stage.
+
+Runs extraction, transcription, classification, censoring and muxing in-process
+over every video in a folder and prints, per stage, the wall-clock time and the
+throughput in media seconds processed per wall-clock second.
+
+    python benchmark.py samples/
+    python benchmark.py samples/ --engine ffmpeg --repeat 3 --json results.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".mkv", ".webm", ".avi", ".m4v")
+
+def find_videos(folder):
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.lower().endswith(VIDEO_EXTENSIONS)
+    )
+
+def run_video(video_path, workdir, engine):
+    """Runs the whole pipeline on one video; returns (stage seconds, media seconds, offensive word count)"""
+    from metrics import StageTimer
+    from transcribe import transcribe_audio
+    from process_transcript import detect_offensive_words
+    from audio_processing import (extract_audio, censor_audio, merge_audio_with_video,
+                                  censor_video_ffmpeg, wav_duration)
+
+    timer = StageTimer()
+    audio_path = os.path.join(workdir, "audio.wav")
+
+    with timer.stage("extract"):
+        if not extract_audio(video_path, audio_path):
+            raise RuntimeError(f"Failed to extract audio from {video_path}")
+    media_seconds = wav_duration(audio_path)
+
+    with timer.stage("transcribe"):
+        transcript = transcribe_audio(audio_path, output_dir=workdir)
+
+    with timer.stage("classify"):
+        detections = detect_offensive_words(transcript["original_text"], transcript["word_timestamps"],
+                                            output_dir=workdir)
+
+    output_video = os.path.join(workdir, "censored.mp4")
+    if engine == "ffmpeg":
+        with timer.stage("censor"):
+            censor_video_ffmpeg(video_path, detections["output_json"], output_video)
+    else:
+        censored_audio = os.path.join(workdir, "censored.wav")
+        with timer.stage("censor"):
+            censor_audio(audio_path, detections["output_json"], censored_audio)
+        with timer.stage("merge"):
+            merge_audio_with_video(video_path, censored_audio, output_video)
+
+    return timer.seconds, media_seconds, len(detections["offensive_words"])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the censoring pipeline per stage")
+    parser.add_argument("folder", help="folder of sample videos")
+    parser.add_argument("--engine", choices=("numpy", "ffmpeg"), default="numpy", help="censor engine")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per video")
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="use the server's word score cache instead of a fresh one per run")
+    parser.add_argument("--json", help="also write per-run timings and the summary to this file")
+    args = parser.parse_args()
+
+    videos = find_videos(args.folder)
+    if not videos:
+        print(f"No videos found in {args.folder}")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory(prefix="cleanvid-bench-") as scratch:
+        if not args.warm_cache:
+            #  Must be set before process_transcript is imported
+            os.environ["SCORE_CACHE_PATH"] = os.path.join(scratch, "word_scores.sqlite3")
+
+        from metrics import stage_summary
+        from transcribe import warm_up
+
+        print("Loading models...")
+        warm_up()
+
+        runs = []
+        records = []
+        for video_path in videos:
+            for attempt in range(args.repeat):
+                workdir = tempfile.mkdtemp(dir=scratch)
+                start = time.perf_counter()
+                seconds, media_seconds, offensive = run_video(video_path, workdir, args.engine)
+                total = time.perf_counter() - start
+
+                runs.append({"video": os.path.basename(video_path), "run": attempt + 1,
+                             "media_seconds": media_seconds, "total_seconds": round(total, 3),
+                             "offensive_words": offensive,
+                             "stages": {name: round(s, 3) for name, s in seconds.items()}})
+                records += [(name, s, media_seconds) for name, s in seconds.items()]
+                records.append(("total", total, media_seconds))
+                print(f"  {os.path.basename(video_path)} #{attempt + 1}: {media_seconds or 0:.1f}s of media "
+                      f"in {total:.1f}s ({offensive} offensive words)")
+
+    summary = stage_summary(records)
+    print(f"\n{'stage':<12}{'runs':>6}{'total s':>10}{'mean s':>10}{'p95 s':>10}{'media s/s':>12}")
+    for name, row in summary.items():
+        rate = row["media_seconds_per_second"]
+        print(f"{name:<12}{row['count']:>6}{row['total_seconds']:>10.2f}{row['mean_seconds']:>10.2f}"
+              f"{row['p95_seconds']:>10.2f}{rate if rate is not None else '-':>12}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"engine": args.engine, "runs": runs, "summary": summary}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+if __name__ == "__main__":
+    main()
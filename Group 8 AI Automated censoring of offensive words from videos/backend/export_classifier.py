@@ -0,0 +1,191 @@
+"""
+Export the offensive-word classifier to ONNX with dynamic int8 quantization.
+
+Writes <model dir>/onnx/model.onnx (fp32), model.int8.onnx and export.json, then
+compares the int8 model with the PyTorch model on the words the classifier really
+sees in production: tokens from the score cache and stored transcripts that the
+lexicon does not decide. It reports label agreement at the detection threshold,
+probability drift and per-batch latency. The verdict is stored in export.json;
+process_transcript.py only switches to ONNX Runtime when the export is approved
+and was made from the model files currently in place.
+
+    python export_classifier.py
+    python export_classifier.py --model-dir path/to/model --words extra_words.txt
+    python export_classifier.py --compare-only
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+from lexicon import Lexicon, normalize_word
+from score_cache import ScoreCache, model_version
+
+#  Same defaults as process_transcript.py, without loading the whole pipeline
+DEFAULT_MODEL_DIR = os.environ.get(
+    "OFFENSIVE_MODEL_DIR", "C:/Users/91994/Desktop/cleanvid/cleanvid-repo/backend/offensive_word_model-main")
+THRESHOLD = 0.7
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_SCORE_CACHE = os.environ.get("SCORE_CACHE_PATH", os.path.join(BASE_DIR, "cache", "word_scores.sqlite3"))
+DEFAULT_RESULTS_DIR = os.path.join(BASE_DIR, "processed", "results")
+#  Fewer validation words than this and the export is never approved
+MIN_VALIDATION_WORDS = 500
+
+def onnx_dir_for(model_dir):
+    return os.environ.get("CLASSIFY_ONNX_DIR", os.path.join(model_dir, "onnx"))
+
+def load_torch(model_dir):
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir).to("cpu")
+    model.config.pad_token_id = tokenizer.pad_token_id
+    model.eval()
+    return tokenizer, model
+
+def export(model_dir, out_dir):
+    """fp32 ONNX export followed by dynamic int8 weight quantization"""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    tokenizer, model = load_torch(model_dir)
+    model.config.return_dict = False
+    sample = tokenizer(["example", "another example"], return_tensors="pt", padding=True)
+    input_names = list(sample.keys())
+
+    os.makedirs(out_dir, exist_ok=True)
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    int8_path = os.path.join(out_dir, "model.int8.onnx")
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model, tuple(sample[name] for name in input_names), fp32_path,
+            input_names=input_names, output_names=["logits"],
+            dynamic_axes={**{name: {0: "batch", 1: "sequence"} for name in input_names}, "logits": {0: "batch"}},
+            opset_version=14,
+        )
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"Exported {fp32_path} and {int8_path}")
+    return int8_path
+
+def validation_words(score_cache_path, results_dir, extra_path=None, limit=20000):
+    """
+    Distinct normalized tokens from the score cache, stored transcripts and an
+    optional word list, minus those the lexicon decides (they never reach the model)
+    """
+    tokens = set()
+    if os.path.exists(score_cache_path):
+        tokens.update(ScoreCache(score_cache_path).tokens(limit))
+    if os.path.isdir(results_dir):
+        for name in sorted(os.listdir(results_dir)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(results_dir, name), "r", encoding="utf-8") as f:
+                    results = json.load(f)
+            except (OSError, ValueError):
+                continue
+            tokens.update(normalize_word(w["word"]) for w in results.get("word_timestamps", []))
+    if extra_path:
+        with open(extra_path, "r", encoding="utf-8") as f:
+            tokens.update(normalize_word(line) for line in f)
+
+    lexicon = Lexicon.load() if os.environ.get("LEXICON_ENABLED", "1") == "1" else None
+    return sorted(t for t in tokens if t and (lexicon is None or lexicon.lookup(t) is None))[:limit]
+
+def compare(model_dir, int8_path, words, batch_size=64, threads=0):
+    """Accuracy and latency of the int8 ONNX model against PyTorch on the same words"""
+    import onnxruntime as ort
+
+    tokenizer, model = load_torch(model_dir)
+    options = ort.SessionOptions()
+    if threads:
+        options.intra_op_num_threads = threads
+        torch.set_num_threads(threads)
+    session = ort.InferenceSession(int8_path, options, providers=["CPUExecutionProvider"])
+    session_inputs = {i.name for i in session.get_inputs()}
+
+    torch_probs, onnx_probs = [], []
+    torch_seconds = onnx_seconds = 0.0
+    for i in range(0, len(words), batch_size):
+        batch = words[i:i + batch_size]
+
+        inputs = tokenizer(batch, return_tensors="pt", padding=True)
+        start = time.perf_counter()
+        with torch.no_grad():
+            logits = model(**inputs).logits
+        torch_seconds += time.perf_counter() - start
+        torch_probs += torch.softmax(logits, dim=1)[:, 1].tolist()
+
+        inputs = tokenizer(batch, return_tensors="np", padding=True)
+        feed = {name: value.astype(np.int64) for name, value in inputs.items() if name in session_inputs}
+        start = time.perf_counter()
+        logits = session.run(["logits"], feed)[0]
+        onnx_seconds += time.perf_counter() - start
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        onnx_probs += (exp[:, 1] / exp.sum(axis=1)).tolist()
+
+    torch_probs, onnx_probs = np.array(torch_probs), np.array(onnx_probs)
+    diff = np.abs(torch_probs - onnx_probs)
+    batches = max(1, -(-len(words) // batch_size))
+    return {
+        "words": len(words),
+        "label_agreement": round(float(np.mean((torch_probs >= THRESHOLD) == (onnx_probs >= THRESHOLD))), 4),
+        "mean_prob_diff": round(float(diff.mean()), 4),
+        "max_prob_diff": round(float(diff.max()), 4),
+        "torch_ms_per_batch": round(1000 * torch_seconds / batches, 2),
+        "onnx_ms_per_batch": round(1000 * onnx_seconds / batches, 2),
+        "speedup": round(torch_seconds / onnx_seconds, 2) if onnx_seconds else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the offensive-word classifier to int8 ONNX")
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR, help="Hugging Face model directory")
+    parser.add_argument("--score-cache", default=DEFAULT_SCORE_CACHE, help="word score cache to take validation words from")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_DIR, help="result store with stored transcripts")
+    parser.add_argument("--words", help="extra validation words, one per line")
+    parser.add_argument("--min-words", type=int, default=MIN_VALIDATION_WORDS,
+                        help="minimum number of validation words to approve")
+    parser.add_argument("--threads", type=int, default=0, help="CPU threads for both runtimes (0 = default)")
+    parser.add_argument("--min-agreement", type=float, default=0.99, help="minimum label agreement to approve")
+    parser.add_argument("--min-speedup", type=float, default=1.0, help="minimum latency speedup to approve")
+    parser.add_argument("--compare-only", action="store_true", help="re-run the comparison on the existing export")
+    args = parser.parse_args()
+
+    out_dir = onnx_dir_for(args.model_dir)
+    int8_path = os.path.join(out_dir, "model.int8.onnx")
+    if not args.compare_only:
+        export(args.model_dir, out_dir)
+    elif not os.path.exists(int8_path):
+        print(f"No export found at {int8_path}")
+        sys.exit(1)
+
+    words = validation_words(args.score_cache, args.results, args.words)
+    report = compare(args.model_dir, int8_path, words, threads=args.threads) if words else {"words": 0}
+    for key, value in report.items():
+        print(f"  {key}: {value}")
+
+    approved = (len(words) >= args.min_words
+                and report["label_agreement"] >= args.min_agreement
+                and (report["speedup"] or 0) >= args.min_speedup)
+    if len(words) < args.min_words:
+        print(f"Only {len(words)} validation words the lexicon leaves to the model (need {args.min_words}); "
+              f"process more videos or pass --words")
+    with open(os.path.join(out_dir, "export.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "source_version": model_version(args.model_dir),
+            "model": "model.int8.onnx",
+            "approved": approved,
+            "thresholds": {"min_agreement": args.min_agreement, "min_speedup": args.min_speedup,
+                           "min_words": args.min_words},
+            "comparison": report,
+        }, f, indent=2)
+
+    print("Approved: process_transcript.py will use ONNX Runtime" if approved else
+          "Not approved: process_transcript.py keeps using PyTorch (set CLASSIFY_BACKEND=onnx to force)")
+    sys.exit(0 if approved else 2)
+
+if __name__ == "__main__":
+    main()
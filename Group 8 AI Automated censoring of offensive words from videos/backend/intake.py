@@ -0,0 +1,153 @@
+import os
+import hashlib
+import subprocess
+import tempfile
+from werkzeug.exceptions import ClientDisconnected
+from werkzeug.sansio.multipart import MultipartDecoder, Data, File, Epilogue, NeedData
+
+CHUNK_SIZE = 1024 * 1024
+
+class StreamingExtractor:
+    """
+    ffmpeg extracting 16 kHz mono WAV from an upload while it is still arriving.
+
+    The upload is written to ffmpeg's stdin chunk by chunk. Containers that can't
+    be decoded from a pipe (e.g. MP4 with the index at the end) make ffmpeg fail;
+    wait() then returns None and the caller extracts from the saved file instead.
+    """
+
+    def __init__(self, audio_path):
+        self.audio_path = audio_path
+        self.log = tempfile.TemporaryFile()
+        try:
+            #  stderr goes to a file: a full stderr pipe would stall ffmpeg and then our writes
+            self.proc = subprocess.Popen(
+                ["ffmpeg", "-loglevel", "error", "-i", "pipe:0", "-vn",
+                 "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1", "-f", "wav", "-y", audio_path],
+                stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self.log,
+            )
+        except OSError as e:
+            print(f" Streaming extraction unavailable: {e}")
+            self.proc = None
+
+    def feed(self, data):
+        if self.proc is None:
+            return
+        try:
+            self.proc.stdin.write(data)
+        except OSError:
+            #  ffmpeg gave up on the stream; keep receiving the upload regardless
+            self.close()
+
+    def close(self):
+        if self.proc is not None and not self.proc.stdin.closed:
+            try:
+                self.proc.stdin.close()
+            except OSError:
+                pass
+
+    def abort(self):
+        """Stops extraction that is no longer needed and removes its partial output"""
+        if self.proc is None:
+            return
+        self.close()
+        self.proc.kill()
+        self.proc.wait()
+        self.log.close()
+        self.proc = None
+        if os.path.exists(self.audio_path):
+            os.remove(self.audio_path)
+
+    def wait(self):
+        """Extracted audio path, or None if streaming extraction failed"""
+        if self.proc is None:
+            return None
+        self.close()
+        returncode = self.proc.wait()
+        self.log.seek(0)
+        errors = self.log.read().decode(errors="replace").strip()
+        self.log.close()
+        if returncode == 0 and os.path.exists(self.audio_path):
+            print(f" Audio extracted while uploading: {self.audio_path}")
+            return self.audio_path
+        print(f" Streaming extraction failed ({returncode}), extracting from the saved file: {errors[-300:]}")
+        return None
+
+class _Tee:
+    """Writes the upload to disk and into the extractor at the same time, hashing it on the way"""
+
+    def __init__(self, path, audio_path):
+        self.file = open(path, "wb")
+        self.extractor = StreamingExtractor(audio_path)
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.file.write(data)
+        self.extractor.feed(data)
+        self.sha256.update(data)
+
+    def close(self):
+        self.file.close()
+        self.extractor.close()
+
+def receive_upload(stream, mimetype, mimetype_params, workspace, audio_path, field="file", filename=None):
+    """
+    Reads an upload from the raw request stream into the workspace, feeding ffmpeg as
+    it goes. Accepts multipart/form-data (the file in `field`) or a raw request body
+    named by `filename`. Returns (video_path, filename, extractor, sha256 hex digest),
+    or None if the request contained no file. Raises ValueError for a malformed or
+    truncated body (e.g. the client disconnected), after discarding what was received.
+    """
+    tee = None
+    video_path = None
+
+    def open_tee(name):
+        nonlocal video_path
+        name = os.path.basename(name or "upload")
+        video_path = os.path.join(workspace, name)
+        return _Tee(video_path, audio_path), name
+
+    try:
+        if mimetype != "multipart/form-data":
+            if not filename:
+                return None
+            tee, filename = open_tee(filename)
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                tee.write(chunk)
+        else:
+            if not mimetype_params.get("boundary"):
+                raise ValueError("multipart upload without a boundary")
+            decoder = MultipartDecoder(mimetype_params["boundary"].encode())
+            in_file = False
+            done = False
+            chunks = iter(lambda: stream.read(CHUNK_SIZE), b"")
+            while not done:
+                event = decoder.next_event()
+                if isinstance(event, NeedData):
+                    decoder.receive_data(next(chunks, None))
+                elif isinstance(event, File):
+                    in_file = event.name == field and tee is None
+                    if in_file:
+                        tee, filename = open_tee(event.filename)
+                elif isinstance(event, Data):
+                    if in_file:
+                        tee.write(event.data)
+                    if not event.more_data:
+                        in_file = False
+                elif isinstance(event, Epilogue):
+                    done = True
+    except (ValueError, ClientDisconnected) as e:
+        #  Nothing usable arrived: stop ffmpeg and drop the partial video
+        if tee:
+            tee.close()
+            tee.extractor.abort()
+            if os.path.exists(video_path):
+                os.remove(video_path)
+        raise ValueError(f"Incomplete or malformed upload: {e}") from e
+    finally:
+        if tee:
+            tee.close()
+
+    if tee is None:
+        return None
+    return video_path, filename, tee.extractor, tee.sha256.hexdigest()
@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+FINISHED = ("done", "error")
+
+class Job:
+    """One queued pipeline run: its stages, progress, result and error"""
+
+    def __init__(self, manager, kind, stages, outputs):
+        self.manager = manager
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.state = "queued"
+        self.stages = [{"name": name, "state": "pending", "seconds": None} for name in stages]
+        self.current = None
+        self.fraction = 0.0
+        self.outputs = list(outputs)  # filenames this job will write to the processed folder
+        self.media_seconds = None     # length of the audio being processed, for throughput
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.version = 0
+        self._stage_start = None
+
+    def _changed(self):
+        with self.manager.changed:
+            self.version += 1
+            self.manager.save(self)
+            self.manager.changed.notify_all()
+
+    def stage(self, name):
+        """Marks the previous stage done and starts the named one"""
+        now = time.time()
+        for stage in self.stages:
+            if stage["name"] == self.current:
+                stage["state"] = "done"
+                stage["seconds"] = round(now - self._stage_start, 3)
+            if stage["name"] == name:
+                stage["state"] = "running"
+        self.current = name
+        self.fraction = 0.0
+        self._stage_start = now
+        self._changed()
+
+    def progress(self, fraction):
+        """Progress within the current stage, 0..1"""
+        self.fraction = max(0.0, min(1.0, fraction))
+        self._changed()
+
+    def to_dict(self):
+        done = sum(1 for stage in self.stages if stage["state"] == "done")
+        running = self.state == "running" and self.current is not None
+        progress = 1.0 if self.state == "done" else (done + (self.fraction if running else 0.0)) / max(1, len(self.stages))
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "state": self.state,
+            "stage": self.current,
+            "stages": self.stages,
+            "progress": round(progress, 3),
+            "outputs": self.outputs,
+            "media_seconds": self.media_seconds,
+            "result": self.result,
+            "error": self.error,
+            "created": self.created,
+            "version": self.version,
+        }
+
+class JobManager:
+    """
+    Runs pipeline jobs on a worker pool instead of inside the Flask request.
+
+    Job state is mirrored to a small JSON file per job, so a forked server worker
+    that did not run the job can still report on it.
+    """
+
+    def __init__(self, directory, workers=1, ttl=24 * 3600):
+        self.directory = directory
+        self.ttl = ttl
+        self.jobs = {}
+        self.changed = threading.Condition()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def save(self, job):
+        tmp_path = f"{self._path(job.id)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job.to_dict(), f)
+        os.replace(tmp_path, self._path(job.id))
+
+    def submit(self, kind, stages, fn, outputs=()):
+        """Queues fn(job) and returns the job; fn's return value becomes the result"""
+        self.prune()
+        job = Job(self, kind, stages, outputs)
+        with self.changed:
+            self.jobs[job.id] = job
+            self.save(job)
+
+        def run():
+            job.state = "running"
+            job._changed()
+            try:
+                result = fn(job)
+                job.stage(None)  # closes the last stage
+                job.result = result
+                job.state = "done"
+            except Exception as e:
+                print(f" Job {job.id} failed: {e}")
+                job.error = str(e)
+                job.state = "error"
+            job._changed()
+
+        self.pool.submit(run)
+        return job
+
+    def get(self, job_id):
+        """Snapshot of a job, from memory or from another worker's file; None if unknown"""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            with self.changed:
+                return job.to_dict()
+        try:
+            with open(self._path(os.path.basename(job_id)), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def wait(self, job_id, version=-1, timeout=15):
+        """Blocks until the job's version moves past `version` or it finishes; returns the snapshot"""
+        deadline = time.time() + timeout
+        while True:
+            snapshot = self.get(job_id)
+            if snapshot is None or snapshot["version"] > version or snapshot["state"] in FINISHED:
+                return snapshot
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return snapshot
+            if job_id in self.jobs:
+                with self.changed:
+                    self.changed.wait(min(remaining, 1.0))
+            else:
+                time.sleep(min(remaining, 0.5))
+
+    def wait_done(self, job_id, timeout=None):
+        """Blocks until the job finishes (or the timeout passes); returns the snapshot"""
+        deadline = None if timeout is None else time.time() + timeout
+        snapshot = self.get(job_id)
+        while snapshot is not None and snapshot["state"] not in FINISHED:
+            remaining = 15 if deadline is None else min(15, deadline - time.time())
+            if remaining <= 0:
+                break
+            snapshot = self.wait(job_id, snapshot["version"], remaining)
+        return snapshot
+
+    def snapshots(self):
+        """Snapshots of every job still on record, from all workers"""
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                snapshot = self.get(name[:-len(".json")])
+                if snapshot is not None:
+                    yield snapshot
+
+    def find_output(self, filename):
+        """The unfinished job that will write this filename, if any"""
+        for snapshot in self.snapshots():
+            if snapshot["state"] not in FINISHED and filename in snapshot["outputs"]:
+                return snapshot
+        return None
+
+    def prune(self):
+        """Forgets finished jobs older than the TTL"""
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if name.endswith(".json") and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    self.jobs.pop(name[:-len(".json")], None)
+            except OSError:
+                pass
@@ -0,0 +1,68 @@
+import os
+import hashlib
+
+LEXICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicon")
+
+#  Inflections stripped when looking up offensive roots (longest first)
+SUFFIXES = ("ings", "ers", "ing", "ed", "er", "es", "in", "s")
+MIN_STEM = 3
+
+#  Custom Tokenizer Function
+def custom_tokenize(text):
+    text = text.lower()
+    for punct in ".,!?;:'\")]}-_":
+        text = text.replace(punct, ' ')
+    for punct in "[({\"-_":
+        text = text.replace(punct, ' ')
+    return [word for word in text.split() if word]
+
+def normalize_word(word):
+    """Lower-cased, punctuation-free form of a transcript word, used as the cache key"""
+    return " ".join(custom_tokenize(word))
+
+def _read_words(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return frozenset(
+            line.strip().lower() for line in f
+            if line.strip() and not line.startswith("#")
+        )
+
+class Lexicon:
+    """
+    First-tier filter in front of the classifier: decides tokens that are known
+    offensive or known safe, and returns None for everything the model must judge
+    """
+
+    def __init__(self, offensive, safe):
+        self.offensive = frozenset(offensive)
+        self.safe = frozenset(safe) - self.offensive
+        #  Changes whenever either word list does, for anything keyed on detection results
+        digest = hashlib.sha256()
+        for words in (self.offensive, self.safe):
+            digest.update("\n".join(sorted(words)).encode() + b"\0")
+        self.version = digest.hexdigest()[:12]
+
+    @classmethod
+    def load(cls, directory=LEXICON_DIR):
+        return cls(_read_words(os.path.join(directory, "offensive.txt")),
+                   _read_words(os.path.join(directory, "safe.txt")))
+
+    def _is_offensive(self, word):
+        if word in self.offensive:
+            return True
+        for suffix in SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+                stem = word[:-len(suffix)]
+                #  "whores" -> "whore", "pissed" -> "piss", "bitching" -> "bitch"
+                if stem in self.offensive or stem + "e" in self.offensive:
+                    return True
+        return False
+
+    def lookup(self, token):
+        """True (offensive), False (safe) or None (undecided) for a normalized token"""
+        parts = token.split()
+        if any(self._is_offensive(part) for part in parts):
+            return True
+        if parts and all(part in self.safe for part in parts):
+            return False
+        return None
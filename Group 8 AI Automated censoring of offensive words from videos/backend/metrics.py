@@ -0,0 +1,54 @@
+import time
+from contextlib import contextmanager
+import numpy as np
+
+#  Pipeline stages in the order they run
+STAGES = ("extract", "transcribe", "classify", "reuse", "censor", "merge", "package")
+
+class StageTimer:
+    """Wall-clock seconds per named stage, for code that runs outside a job"""
+
+    def __init__(self):
+        self.seconds = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+def job_records(snapshot):
+    """(stage, seconds, media_seconds) for every finished stage of a job snapshot"""
+    for stage in snapshot.get("stages", []):
+        if stage["state"] == "done" and stage["seconds"] is not None:
+            yield stage["name"], stage["seconds"], snapshot.get("media_seconds")
+
+def stage_summary(records):
+    """
+    Per-stage count, latency percentiles and throughput (media seconds processed
+    per wall-clock second) from (stage, seconds, media_seconds) records.
+    """
+    by_stage = {}
+    for name, seconds, media_seconds in records:
+        by_stage.setdefault(name, []).append((seconds, media_seconds))
+
+    summary = {}
+    for name in sorted(by_stage, key=lambda n: STAGES.index(n) if n in STAGES else len(STAGES)):
+        seconds = np.array([s for s, _ in by_stage[name]])
+        #  Throughput only over the runs whose media length is known
+        timed_media = [(s, m) for s, m in by_stage[name] if m]
+        media_total = sum(m for _, m in timed_media)
+        media_wall = sum(s for s, _ in timed_media)
+        summary[name] = {
+            "count": len(seconds),
+            "total_seconds": round(float(seconds.sum()), 3),
+            "mean_seconds": round(float(seconds.mean()), 3),
+            "p50_seconds": round(float(np.percentile(seconds, 50)), 3),
+            "p95_seconds": round(float(np.percentile(seconds, 95)), 3),
+            "max_seconds": round(float(seconds.max()), 3),
+            "media_seconds": round(media_total, 2),
+            "media_seconds_per_second": round(media_total / media_wall, 2) if media_wall > 0 else None,
+        }
+    return summary
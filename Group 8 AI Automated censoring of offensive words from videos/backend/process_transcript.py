@@ -1,39 +1,168 @@
 import json
 import os
+import time
+import numpy as np
 import torch
 from transformers import AutoModelForSequenceClassification, AutoTokenizer
-
-#  Custom Tokenizer Function
-def custom_tokenize(text):
-    text = text.lower()
-    for punct in ".,!?;:'\")]}-_":
-        text = text.replace(punct, ' ')
-    for punct in "[({\"-_":
-        text = text.replace(punct, ' ')
-    return [word for word in text.split() if word]
+from score_cache import ScoreCache, model_version
+from lexicon import Lexicon, custom_tokenize, normalize_word
+from export_classifier import onnx_dir_for
 
 #  Load NLP Model
-MODEL_DIR = "C:/Users/91994/Desktop/cleanvid/cleanvid-repo/backend/offensive_word_model-main"
+MODEL_DIR = os.environ.get(
+    "OFFENSIVE_MODEL_DIR", "C:/Users/91994/Desktop/cleanvid/cleanvid-repo/backend/offensive_word_model-main")
 TOKENIZER = AutoTokenizer.from_pretrained(MODEL_DIR)
-NLP_MODEL = AutoModelForSequenceClassification.from_pretrained(MODEL_DIR).to("cpu")
+if TOKENIZER.pad_token is None:
+    TOKENIZER.pad_token = TOKENIZER.eos_token
+
+#  Words per forward pass, and optional CPU thread count
+BATCH_SIZE = int(os.environ.get("CLASSIFY_BATCH_SIZE", "64"))
+CLASSIFY_THREADS = int(os.environ.get("CLASSIFY_THREADS", "0"))
+if CLASSIFY_THREADS:
+    torch.set_num_threads(CLASSIFY_THREADS)
+
+#  "auto": ONNX Runtime when an approved int8 export of this exact model exists
+#  (see export_classifier.py); "torch" or "onnx" to force one
+CLASSIFY_BACKEND = os.environ.get("CLASSIFY_BACKEND", "auto")
+
+def load_onnx_session(model_dir, source_version, force=False):
+    """int8 ONNX Runtime session for the classifier, or None to stay on PyTorch"""
+    onnx_dir = onnx_dir_for(model_dir)
+    try:
+        with open(os.path.join(onnx_dir, "export.json"), "r", encoding="utf-8") as f:
+            export = json.load(f)
+    except (OSError, ValueError):
+        if force:
+            raise RuntimeError(f"CLASSIFY_BACKEND=onnx but there is no export in {onnx_dir}")
+        return None
+
+    if not force and not export.get("approved"):
+        print(" ONNX export not approved by its comparison, using PyTorch")
+        return None
+    if not force and export.get("source_version") != source_version:
+        print(" ONNX export is from different model files, using PyTorch (re-run export_classifier.py)")
+        return None
+
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    if CLASSIFY_THREADS:
+        options.intra_op_num_threads = CLASSIFY_THREADS
+    return ort.InferenceSession(os.path.join(onnx_dir, export["model"]), options,
+                                providers=["CPUExecutionProvider"])
+
+MODEL_VERSION = model_version(MODEL_DIR)
+ONNX_SESSION = None
+if CLASSIFY_BACKEND != "torch":
+    ONNX_SESSION = load_onnx_session(MODEL_DIR, MODEL_VERSION, force=CLASSIFY_BACKEND == "onnx")
+
+if ONNX_SESSION is not None:
+    NLP_MODEL = None
+    ONNX_INPUTS = {i.name for i in ONNX_SESSION.get_inputs()}
+    #  int8 scores differ slightly from fp32, so they are cached separately
+    MODEL_VERSION += "-onnx-int8"
+    print(" Offensive-word classifier running on ONNX Runtime (int8)")
+else:
+    NLP_MODEL = AutoModelForSequenceClassification.from_pretrained(MODEL_DIR).to("cpu")
+    #  Batched forward passes need the model to know the (possibly borrowed) pad token
+    NLP_MODEL.config.pad_token_id = TOKENIZER.pad_token_id
+    NLP_MODEL.eval()
+
+#  Scores per normalized token, persisted across jobs
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCORE_CACHE = ScoreCache(
+    os.environ.get("SCORE_CACHE_PATH", os.path.join(BASE_DIR, "cache", "word_scores.sqlite3")),
+    max_entries=int(os.environ.get("SCORE_CACHE_MAX", "200000")),
+)
+
+#  Known-offensive / known-safe tokens decided without the classifier
+LEXICON = Lexicon.load() if os.environ.get("LEXICON_ENABLED", "1") == "1" else None
+
+#  Running average of classifier time per token, to estimate time saved
+_seconds_per_token = {"value": None}
 
-def detect_offensive_words(text, words, threshold=0.7):
-    """Detects offensive words and replaces them in the text"""
+def classify_words(words, batch_size=BATCH_SIZE):
+    """Returns the offensive-class probability of each word, classified in padded batches"""
+    probs = [0.0] * len(words)
+
+    #  Group words of similar length so batches carry little padding
+    order = sorted(range(len(words)), key=lambda i: len(words[i]))
+
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        if ONNX_SESSION is not None:
+            inputs = TOKENIZER([words[i] for i in batch], return_tensors="np", padding=True)
+            feed = {name: value.astype(np.int64) for name, value in inputs.items() if name in ONNX_INPUTS}
+            logits = ONNX_SESSION.run(["logits"], feed)[0]
+            exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+            scores = (exp[:, 1] / exp.sum(axis=1)).tolist()
+        else:
+            inputs = TOKENIZER([words[i] for i in batch], return_tensors="pt", padding=True)
+            with torch.no_grad():
+                logits = NLP_MODEL(**inputs).logits
+            scores = torch.softmax(logits, dim=1)[:, 1].tolist()
+        for i, score in zip(batch, scores):
+            probs[i] = score
+
+    return probs
+
+def score_tokens(tokens):
+    """
+    Offensive probability per distinct token: the lexicon decides what it can,
+    then cached scores for this model, and only the rest go through the classifier
+    """
+    stats = {"lexicon_offensive": 0, "lexicon_safe": 0, "cache_hits": 0,
+             "model_fallbacks": 0, "model_seconds": 0.0}
+    scores = {}
+    undecided = []
+    for token in tokens:
+        verdict = LEXICON.lookup(token) if LEXICON else None
+        if verdict is None:
+            undecided.append(token)
+        else:
+            scores[token] = 1.0 if verdict else 0.0
+            stats["lexicon_offensive" if verdict else "lexicon_safe"] += 1
+
+    cached = SCORE_CACHE.get_many(MODEL_VERSION, undecided)
+    scores.update(cached)
+    stats["cache_hits"] = len(cached)
+
+    missing = [token for token in undecided if token not in cached]
+    if missing:
+        start = time.time()
+        new_scores = dict(zip(missing, classify_words(missing)))
+        elapsed = time.time() - start
+        SCORE_CACHE.put_many(MODEL_VERSION, new_scores)
+        scores.update(new_scores)
+        stats["model_fallbacks"] = len(missing)
+        stats["model_seconds"] = round(elapsed, 3)
+
+        per_token = elapsed / len(missing)
+        previous = _seconds_per_token["value"]
+        _seconds_per_token["value"] = per_token if previous is None else 0.8 * previous + 0.2 * per_token
+
+    #  Tokens that skipped the classifier, priced at the measured per-token cost
+    skipped = len(tokens) - stats["model_fallbacks"]
+    stats["est_seconds_saved"] = round(skipped * (_seconds_per_token["value"] or 0.0), 3)
+    return scores, stats
+
+def detect_offensive_words(text, words, threshold=0.7, output_dir=None):
+    """Detects offensive words and replaces them in the text, saving them to output_dir"""
     censored_text = text
     offensive_words = []
-    
-    for word_data in words:
+
+    #  Each distinct normalized token is scored once (lexicon, cache, then model)
+    tokens = [normalize_word(word_data["word"]) for word_data in words]
+    distinct = sorted(set(token for token in tokens if token))
+    scores, stats = score_tokens(distinct)
+    probs = [scores.get(token, 0.0) for token in tokens]
+    stats = dict(words=len(words), distinct_tokens=len(distinct), **stats)
+
+    for word_data, offensive_prob in zip(words, probs):
         word = word_data["word"]
         start_time = word_data["start"]
         end_time = word_data["end"]
 
-        # Tokenize and classify word
-        inputs = TOKENIZER(word, return_tensors="pt")
-        with torch.no_grad():
-            logits = NLP_MODEL(**inputs).logits
-        scores = torch.softmax(logits, dim=1)[0].tolist()
-        offensive_prob = scores[1]
-
         if offensive_prob >= threshold:
             censored_text = censored_text.replace(word, "****")
             offensive_words.append({
@@ -41,15 +170,15 @@ def detect_offensive_words(text, words, threshold=0.7):
             })
 
     #  Save Output
-    BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))  # Move up one level
-    PROCESSED_FOLDER = os.path.join(BASE_DIR, "processed")
-    output_json_path = os.path.join(PROCESSED_FOLDER, "offensive_words.json")
-    os.makedirs(PROCESSED_FOLDER, exist_ok=True)
+    output_dir = output_dir or os.path.join(BASE_DIR, "processed")
+    output_json_path = os.path.join(output_dir, "offensive_words.json")
+    os.makedirs(output_dir, exist_ok=True)
     with open(output_json_path, "w", encoding="utf-8") as f:
         json.dump({"censored_text": censored_text, "offensive_words": offensive_words}, f, indent=2)
 
     return {
         "censored_text": censored_text,
         "offensive_words": offensive_words,
-        "output_json": output_json_path
+        "output_json": output_json_path,
+        "stats": stats
     }
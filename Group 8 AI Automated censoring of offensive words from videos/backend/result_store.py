@@ -0,0 +1,68 @@
+import os
+import json
+import hashlib
+import threading
+
+class ResultStore:
+    """
+    Transcripts and detections of past uploads, keyed by the video's SHA-256 and
+    the pipeline version that produced them.
+
+    One JSON file per (hash, version) so every forked worker sees the same results;
+    the oldest files are dropped beyond max_entries.
+    """
+
+    def __init__(self, directory, max_entries=500):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, sha256, version):
+        #  The version embeds model names and paths (e.g. "Systran/faster-whisper-small"),
+        #  so only its hash goes into the filename
+        version_hash = hashlib.sha256(version.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"{sha256}_{version_hash}.json")
+
+    def get(self, sha256, version):
+        """Stored results for this video and pipeline version, or None"""
+        path = self._path(sha256, version)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                results = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.utime(path)  # recently used entries survive pruning
+        return results
+
+    def put(self, sha256, version, results):
+        """Best effort: a failed write only means the next identical upload runs the pipeline"""
+        path = self._path(sha256, version)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(results, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f" Could not store results for {sha256[:12]}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.prune()
+
+    def prune(self):
+        with self.lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    path = os.path.join(self.directory, name)
+                    try:
+                        entries.append((os.path.getmtime(path), path))
+                    except OSError:
+                        pass
+            entries.sort()
+            for _, path in entries[:max(0, len(entries) - self.max_entries)]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,123 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+def model_version(model_dir):
+    """Fingerprint of the model files, so cached scores are dropped when the model changes"""
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(model_dir)):
+        path = os.path.join(model_dir, name)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:16]
+
+class ScoreCache:
+    """
+    Persistent cache of classifier probabilities per normalized token.
+
+    Entries are keyed by (model_version, token) in SQLite so they survive restarts
+    and are shared by every job, with a small in-memory LRU in front. The database
+    is bounded to max_entries rows; the least recently used rows are pruned.
+    """
+
+    def __init__(self, path, max_entries=200000, memory_entries=20000):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()  # (model_version, token) -> prob
+        self.lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _db(self):
+        #  One connection per process, so forked workers don't share a handle
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS scores ("
+                " model_version TEXT NOT NULL, token TEXT NOT NULL,"
+                " prob REAL NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (model_version, token))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)")
+            self._pid = os.getpid()
+            self.memory.clear()
+        return self._conn
+
+    def _remember(self, key, prob):
+        self.memory[key] = prob
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get_many(self, model_version, tokens):
+        """Returns {token: prob} for the tokens already scored by this model version"""
+        found = {}
+        with self.lock:
+            db = self._db()
+            missing = []
+            for token in tokens:
+                key = (model_version, token)
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[token] = self.memory[key]
+                else:
+                    missing.append(token)
+
+            #  SQLite caps bound parameters, so look up in slices
+            for i in range(0, len(missing), 500):
+                chunk = missing[i:i + 500]
+                rows = db.execute(
+                    f"SELECT token, prob FROM scores WHERE model_version = ? "
+                    f"AND token IN ({','.join('?' * len(chunk))})",
+                    [model_version] + chunk,
+                ).fetchall()
+                for token, prob in rows:
+                    found[token] = prob
+                    self._remember((model_version, token), prob)
+
+            if found:
+                now = time.time()
+                db.executemany(
+                    "UPDATE scores SET last_used = ? WHERE model_version = ? AND token = ?",
+                    [(now, model_version, token) for token in found],
+                )
+                db.commit()
+        return found
+
+    def tokens(self, limit):
+        """Most recently used distinct tokens of any model version, i.e. words that reached the classifier"""
+        with self.lock:
+            rows = self._db().execute(
+                "SELECT token FROM scores GROUP BY token ORDER BY MAX(last_used) DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [token for (token,) in rows]
+
+    def put_many(self, model_version, scores):
+        """Stores {token: prob} for a model version and prunes the oldest rows"""
+        if not scores:
+            return
+        now = time.time()
+        with self.lock:
+            db = self._db()
+            db.executemany(
+                "INSERT OR REPLACE INTO scores (model_version, token, prob, last_used) VALUES (?, ?, ?, ?)",
+                [(model_version, token, prob, now) for token, prob in scores.items()],
+            )
+            for token, prob in scores.items():
+                self._remember((model_version, token), prob)
+
+            (count,) = db.execute("SELECT COUNT(*) FROM scores").fetchone()
+            if count > self.max_entries:
+                db.execute(
+                    "DELETE FROM scores WHERE rowid IN "
+                    "(SELECT rowid FROM scores ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            db.commit()
@@ -1,22 +1,157 @@
-import whisper
 import json
 import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import torch
+from whisper_backends import load_backend, load_wav, result_words, SAMPLE_RATE
 
-#  Load Whisper Model
-WHISPER_MODEL = whisper.load_model("base")
+#  Load Whisper Model (backend, size and compute type come from the environment)
+_load_start = time.time()
+WHISPER_MODEL = load_backend()
+MODEL_STATE = {
+    "model": WHISPER_MODEL.size,
+    "backend": WHISPER_MODEL.name,
+    "compute_type": WHISPER_MODEL.compute_type,
+    "load_seconds": round(time.time() - _load_start, 2),
+    "warmup_seconds": None,
+    "ready": False,
+}
 
-def transcribe_audio(audio_path):
-    """Transcribes audio using Whisper and extracts word timestamps"""
-    result = WHISPER_MODEL.transcribe(audio_path, word_timestamps=True)
+#  openai-whisper installs per-call hooks on the shared model, so concurrent in-process
+#  transcriptions take turns here (chunked ones run in the window workers instead)
+_transcribe_lock = threading.Lock()
 
-    word_timestamps = [
-        {"word": word["word"], "start": round(word["start"], 2), "end": round(word["end"], 2)}
-        for segment in result.get("segments", []) for word in segment.get("words", [])
-    ]
+#  Long audio is split into windows transcribed by forked copies of the model
+WHISPER_PROCS = int(os.environ.get("WHISPER_PROCS", str(min(4, os.cpu_count() or 1))))
+CHUNK_SECONDS = float(os.environ.get("WHISPER_CHUNK_SECONDS", "60"))
+OVERLAP_SECONDS = float(os.environ.get("WHISPER_OVERLAP_SECONDS", "1.0"))
+CUT_SEARCH_SECONDS = 3.0  # how far from the nominal cut to look for a quiet frame
+FRAME_SECONDS = 0.03
+
+#  Window workers, forked once at startup (see start_window_pool)
+_window_pool = None
+
+def chunking_available():
+    return WHISPER_PROCS > 1 and WHISPER_MODEL.forkable and hasattr(os, "fork")
+
+def start_window_pool():
+    """
+    Forks the window workers. Must run while this process has no other threads
+    (after warm_up, before the job pool or request threads start): forking while
+    another thread holds a torch/OpenMP or logging lock can deadlock the children.
+    """
+    global _window_pool
+    if _window_pool is not None or not chunking_available():
+        return
+    if threading.active_count() > 1:
+        print(" Not starting Whisper window workers: other threads are already running")
+        return
+    threads = max(1, (os.cpu_count() or 1) // WHISPER_PROCS)
+    _window_pool = ProcessPoolExecutor(WHISPER_PROCS, mp_context=multiprocessing.get_context("fork"),
+                                       initializer=_init_window_worker, initargs=(threads,))
+    #  Workers are forked on the first submit, so do that now rather than from a job thread
+    _window_pool.submit(int).result()
+    print(f" Started {WHISPER_PROCS} Whisper window workers")
+
+def warm_up():
+    """Runs one inference on a second of silence before the server takes traffic"""
+    start = time.time()
+    WHISPER_MODEL.transcribe(np.zeros(16000, dtype=np.float32), word_timestamps=False)
+    MODEL_STATE["warmup_seconds"] = round(time.time() - start, 2)
+    start_window_pool()
+    MODEL_STATE["ready"] = True
+
+def cut_points(audio, chunk_seconds=CHUNK_SECONDS, search_seconds=CUT_SEARCH_SECONDS):
+    """Sample positions to split at: the quietest frame near every chunk_seconds"""
+    frame = int(FRAME_SECONDS * SAMPLE_RATE)
+    n_frames = len(audio) // frame
+    energy = np.sqrt(np.mean(audio[:n_frames * frame].reshape(n_frames, frame) ** 2, axis=1))
+
+    cuts = []
+    nominal = chunk_seconds
+    while (nominal + chunk_seconds / 2) * SAMPLE_RATE < len(audio):
+        lo = max(0, int((nominal - search_seconds) / FRAME_SECONDS))
+        hi = min(n_frames, int((nominal + search_seconds) / FRAME_SECONDS) + 1)
+        quietest = lo + int(np.argmin(energy[lo:hi]))
+        cuts.append(quietest * frame + frame // 2)
+        nominal = cuts[-1] / SAMPLE_RATE + chunk_seconds
+    return cuts
+
+def _init_window_worker(threads):
+    torch.set_num_threads(threads)
+
+def _transcribe_window(window, offset):
+    """Runs in a forked worker, on the model inherited from the parent"""
+    result = WHISPER_MODEL.transcribe(window, word_timestamps=True, condition_on_previous_text=False)
+    return result_words(result, offset)
+
+def stitch(windows, cuts):
+    """
+    Joins per-window word lists. Each word belongs to the window whose side of the
+    cut its midpoint falls on, which drops the copies transcribed in both overlaps.
+    """
+    bounds = [0.0] + [cut / SAMPLE_RATE for cut in cuts] + [float("inf")]
+    words = []
+    for i, window_words in enumerate(windows):
+        for word in window_words:
+            middle = (word["start"] + word["end"]) / 2
+            if not bounds[i] <= middle < bounds[i + 1]:
+                continue
+            #  Same word straddling the cut, picked up on both sides
+            if words and words[-1]["word"].strip().lower() == word["word"].strip().lower() \
+                    and abs(words[-1]["start"] - word["start"]) < 0.3:
+                continue
+            words.append(word)
+    return words
+
+def transcribe_chunked(audio, pool):
+    """
+    Transcribes long audio as overlapping windows split at quiet points, spread over
+    the worker processes of the pool, and stitches the word timestamps back onto one
+    timeline. Returns (text, words).
+    """
+    cuts = cut_points(audio)
+    overlap = int(OVERLAP_SECONDS * SAMPLE_RATE)
+    edges = [0] + cuts + [len(audio)]
+    windows = [(max(0, a - overlap), min(len(audio), b + overlap)) for a, b in zip(edges, edges[1:])]
+
+    #  The workers were forked after the model loaded and share its weights copy-on-write
+    futures = [pool.submit(_transcribe_window, audio[a:b], a / SAMPLE_RATE) for a, b in windows]
+    results = [future.result() for future in futures]
+
+    words = stitch(results, cuts)
+    return "".join(word["word"] for word in words).strip(), words
+
+def transcribe_audio(audio_path, output_dir="processed"):
+    """Transcribes audio using Whisper and extracts word timestamps into output_dir"""
+    global _window_pool
+    audio = load_wav(audio_path)
+    #  No pool (warm_up not run, or threads already running) means in-process transcription
+    chunked = _window_pool is not None and len(audio) > 1.5 * CHUNK_SECONDS * SAMPLE_RATE
+
+    result = None
+    pool = _window_pool
+    if chunked and pool is not None:
+        #  No lock: windows only go to the worker processes, so concurrent jobs share the pool
+        try:
+            text, word_timestamps = transcribe_chunked(audio, pool)
+            result = {"text": text}
+        except BrokenProcessPool:
+            #  A worker died (e.g. out of memory); re-forking now could deadlock, so stop chunking
+            print(" Whisper window workers died, transcribing in-process from now on")
+            _window_pool = None
+    if result is None:
+        with _transcribe_lock:
+            result = WHISPER_MODEL.transcribe(audio, word_timestamps=True)
+        word_timestamps = result_words(result)
 
     #  Save output to JSON file
-    output_json_path = "processed/output.json"
-    os.makedirs("processed", exist_ok=True)
+    output_json_path = os.path.join(output_dir, "output.json")
+    os.makedirs(output_dir, exist_ok=True)
     with open(output_json_path, "w", encoding="utf-8") as f:
         json.dump(word_timestamps, f, indent=2)
 
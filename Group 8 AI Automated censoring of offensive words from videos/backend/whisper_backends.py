@@ -0,0 +1,98 @@
+import os
+import wave
+import numpy as np
+import torch
+
+SAMPLE_RATE = 16000
+
+#  Backend, model size, int8/float32 etc. and CPU threads for this deployment
+WHISPER_BACKEND = os.environ.get("WHISPER_BACKEND", "openai")
+WHISPER_MODEL_SIZE = os.environ.get("WHISPER_MODEL_SIZE", "base")
+WHISPER_COMPUTE_TYPE = os.environ.get("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_THREADS = int(os.environ.get("WHISPER_THREADS", "0"))  # 0 = library default
+
+class OpenAIWhisperBackend:
+    """The original PyTorch openai-whisper model"""
+
+    name = "openai"
+    #  Runs in forked window workers (see transcribe_chunked)
+    forkable = True
+
+    def __init__(self, size, threads=0):
+        import whisper
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.size = size
+        self.compute_type = "float32"
+        self.model = whisper.load_model(size, device="cpu")
+
+    def transcribe(self, audio, word_timestamps=True, condition_on_previous_text=True):
+        return self.model.transcribe(audio, word_timestamps=word_timestamps,
+                                     condition_on_previous_text=condition_on_previous_text, fp16=False)
+
+class FasterWhisperBackend:
+    """
+    CTranslate2 Whisper (faster-whisper), int8 weights by default.
+    Returns the same text/segments/words structure as openai-whisper.
+    """
+
+    name = "faster"
+    #  CTranslate2 runs its own thread pool and is not safe to use after fork
+    forkable = False
+
+    def __init__(self, size, compute_type="int8", threads=0):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError("WHISPER_BACKEND=faster needs the faster-whisper package (pip install faster-whisper)")
+
+        self.size = size
+        self.compute_type = compute_type
+        self.model = WhisperModel(size, device="cpu", compute_type=compute_type, cpu_threads=threads)
+
+    def transcribe(self, audio, word_timestamps=True, condition_on_previous_text=True):
+        #  Greedy decoding, like openai-whisper's default
+        segments, info = self.model.transcribe(audio, beam_size=1, word_timestamps=word_timestamps,
+                                               condition_on_previous_text=condition_on_previous_text)
+        result = {"text": "", "segments": [], "language": info.language}
+        for segment in segments:
+            result["text"] += segment.text
+            result["segments"].append({
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text,
+                "words": [{"word": w.word, "start": w.start, "end": w.end, "probability": w.probability}
+                          for w in (segment.words or [])],
+            })
+        return result
+
+def load_wav(audio_path):
+    """float32 samples of a 16 kHz WAV, or Whisper's ffmpeg decode for anything else"""
+    try:
+        with wave.open(audio_path, "rb") as wav:
+            if wav.getframerate() == SAMPLE_RATE and wav.getsampwidth() == 2:
+                samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2")
+                samples = samples.reshape(-1, wav.getnchannels()).mean(axis=1)
+                return (samples / 32768.0).astype(np.float32)
+    except (wave.Error, EOFError):
+        pass
+    import whisper
+
+    return whisper.load_audio(audio_path)
+
+def result_words(result, offset=0.0):
+    """word_timestamps list from a transcription result, shifted by offset seconds"""
+    return [
+        {"word": word["word"], "start": round(word["start"] + offset, 2), "end": round(word["end"] + offset, 2)}
+        for segment in result.get("segments", []) for word in segment.get("words", [])
+    ]
+
+def load_backend(name=WHISPER_BACKEND, size=WHISPER_MODEL_SIZE, compute_type=WHISPER_COMPUTE_TYPE,
+                 threads=WHISPER_THREADS):
+    """Loads the configured transcription backend"""
+    if name == "openai":
+        return OpenAIWhisperBackend(size, threads)
+    if name == "faster":
+        return FasterWhisperBackend(size, compute_type, threads)
+    raise ValueError(f"Unknown WHISPER_BACKEND: {name} (expected openai or faster)")
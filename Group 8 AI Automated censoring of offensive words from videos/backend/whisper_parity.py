@@ -0,0 +1,90 @@
+"""
+Word-timestamp parity check between two transcription backends.
+
+Transcribes the same audio with both backends, aligns the word sequences and
+reports how many words match and how far their timestamps drift. Exits non-zero
+when the match rate or timestamp drift is outside tolerance, so it can gate a
+switch of WHISPER_BACKEND in a deployment.
+
+    python whisper_parity.py processed/sample.wav
+    python whisper_parity.py sample.wav --size small --compute-type int8 --max-delta 0.25
+"""
+import sys
+import time
+import argparse
+from difflib import SequenceMatcher
+import numpy as np
+from whisper_backends import load_backend, load_wav, result_words
+
+def normalize(word):
+    return "".join(c for c in word.lower() if c.isalnum())
+
+def compare(reference, candidate):
+    """Alignment stats between two word_timestamps lists"""
+    ref_tokens = [normalize(w["word"]) for w in reference]
+    cand_tokens = [normalize(w["word"]) for w in candidate]
+    matcher = SequenceMatcher(None, ref_tokens, cand_tokens, autojunk=False)
+
+    start_deltas, end_deltas = [], []
+    for block in matcher.get_matching_blocks():
+        for k in range(block.size):
+            ref, cand = reference[block.a + k], candidate[block.b + k]
+            start_deltas.append(abs(ref["start"] - cand["start"]))
+            end_deltas.append(abs(ref["end"] - cand["end"]))
+
+    matched = len(start_deltas)
+    return {
+        "reference_words": len(reference),
+        "candidate_words": len(candidate),
+        "matched_words": matched,
+        "match_rate": round(matched / max(1, len(reference)), 3),
+        "mean_start_delta": round(float(np.mean(start_deltas)), 3) if matched else None,
+        "p95_start_delta": round(float(np.percentile(start_deltas, 95)), 3) if matched else None,
+        "mean_end_delta": round(float(np.mean(end_deltas)), 3) if matched else None,
+        "p95_end_delta": round(float(np.percentile(end_deltas, 95)), 3) if matched else None,
+    }
+
+def run(backend, audio):
+    start = time.time()
+    result = backend.transcribe(audio, word_timestamps=True)
+    return result_words(result), time.time() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare word timestamps of two Whisper backends")
+    parser.add_argument("audio", help="audio file (16 kHz WAV as produced by extract_audio, or anything ffmpeg reads)")
+    parser.add_argument("--reference", default="openai", help="reference backend")
+    parser.add_argument("--candidate", default="faster", help="backend being checked")
+    parser.add_argument("--size", default="base", help="model size for both backends")
+    parser.add_argument("--compute-type", default="int8", help="compute type of the faster backend")
+    parser.add_argument("--threads", type=int, default=0, help="CPU threads per backend (0 = default)")
+    parser.add_argument("--min-match", type=float, default=0.9, help="minimum share of reference words matched")
+    parser.add_argument("--max-delta", type=float, default=0.3, help="maximum p95 start/end drift in seconds")
+    args = parser.parse_args()
+
+    audio = load_wav(args.audio)
+    results = {}
+    for name in (args.reference, args.candidate):
+        backend = load_backend(name, args.size, args.compute_type, args.threads)
+        run(backend, np.zeros(16000, dtype=np.float32))  # warm-up, not timed
+        words, seconds = run(backend, audio)
+        results[name] = words
+        print(f"{name:>8} ({backend.compute_type}): {len(words)} words in {seconds:.2f}s")
+
+    stats = compare(results[args.reference], results[args.candidate])
+    for key, value in stats.items():
+        print(f"  {key}: {value}")
+
+    failures = []
+    if stats["match_rate"] < args.min_match:
+        failures.append(f"match rate {stats['match_rate']} < {args.min_match}")
+    for key in ("p95_start_delta", "p95_end_delta"):
+        if stats[key] is not None and stats[key] > args.max_delta:
+            failures.append(f"{key} {stats[key]}s > {args.max_delta}s")
+
+    if failures:
+        print("PARITY FAILED: " + "; ".join(failures))
+        sys.exit(1)
+    print("Parity OK")
+
+if __name__ == "__main__":
+    main()
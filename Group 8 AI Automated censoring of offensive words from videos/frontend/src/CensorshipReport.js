@@ -32,7 +32,7 @@ const CensorshipReport = () => {
       await fetch("http://127.0.0.1:5000/save_updated_json", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ censored_words: updatedWords }),
+        body: JSON.stringify({ censored_words: updatedWords, unique_id: report.unique_id }),
       });
     } catch (error) {
       console.error("❌ Error saving updated JSON file:", error);
@@ -59,10 +59,10 @@ const CensorshipReport = () => {
 
       const data = await response.json();
 
-      if (data.censored_video) {
-        localStorage.setItem("censorshipReport", JSON.stringify(data));
-        console.log("✅ Censorship complete. Redirecting to /download");
-        navigate("/download");
+      if (data.job_id) {
+        localStorage.setItem("currentJob", JSON.stringify({ job_id: data.job_id, kind: "censor" }));
+        console.log("🚀 Censorship queued. Following progress on /loading");
+        navigate("/loading");
       } else {
         alert("❌ Error processing the video.");
         setIsProcessing(false);
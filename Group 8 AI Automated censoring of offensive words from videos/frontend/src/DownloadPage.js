@@ -10,6 +10,14 @@ const DownloadPage = () => {
     setReport(storedReport);
   }, []);
 
+  const handleGoHome = () => {
+    //  The upload's intermediate files are no longer needed once the user leaves
+    if (report?.unique_id) {
+      fetch(`http://127.0.0.1:5000/workspace/${report.unique_id}`, { method: "DELETE" }).catch(() => {});
+    }
+    navigate("/");
+  };
+
   const handleDownload = () => {
     if (report?.censored_video) {
       window.location.href = report.censored_video;
@@ -22,11 +30,27 @@ const DownloadPage = () => {
         <h1 className="app-title">🎉 Thank You for Using CleanVid!</h1>
         <p className="mb-4">Your censored video is ready for download.</p>
 
+        {report?.censored_video && (
+          //  Served inline with Range support: playback starts at once and seeking fetches only what is needed
+          <video
+            className="w-100 mb-4"
+            src={`${report.censored_video}?inline=1`}
+            controls
+            preload="metadata"
+          />
+        )}
+
         <button className="btn btn-app-primary mb-4" onClick={handleDownload}>
           Download Censored Video
         </button>
 
-        <button className="btn btn-app-secondary" onClick={() => navigate("/")}>
+        {report?.hls_playlist && (
+          <p className="mb-4">
+            HLS stream: <a href={report.hls_playlist}>{report.hls_playlist}</a>
+          </p>
+        )}
+
+        <button className="btn btn-app-secondary" onClick={handleGoHome}>
           Go Back Home
         </button>
       </div>
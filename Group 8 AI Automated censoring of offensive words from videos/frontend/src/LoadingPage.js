@@ -1,35 +1,122 @@
-import React, { useEffect } from "react";
+import React, { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 
+const API_URL = "http://127.0.0.1:5000";
+
+const STAGE_LABELS = {
+  extract: "Extracting audio",
+  transcribe: "Transcribing speech",
+  classify: "Detecting offensive words",
+  censor: "Censoring audio",
+  merge: "Merging audio and video",
+  package: "Preparing the video for streaming",
+  reuse: "Reusing results of an identical upload",
+};
+
 const LoadingPage = () => {
   const navigate = useNavigate();
+  const [job, setJob] = useState(null);
 
   useEffect(() => {
-    const checkProcessing = setInterval(() => {
-      const report = JSON.parse(localStorage.getItem("censorshipReport"));
-
-      if (report && report.censored_words && report.censored_words.length > 0) {
-        console.log("✅ Processing complete. Redirecting to report page.");
-        clearInterval(checkProcessing);
-        navigate("/report");  // ✅ Move to report only when new data is ready
-      } else if (report && report.contains_offensive_words === false) {
-        console.log("✅ No offensive words. Redirecting to download page.");
-        clearInterval(checkProcessing);
-        navigate("/download");
-      } else {
-        console.log("⏳ Still processing...");
+    const currentJob = JSON.parse(localStorage.getItem("currentJob"));
+    if (!currentJob) {
+      navigate("/");
+      return;
+    }
+
+    let events = null;
+    let poll = null;
+    let finished = false;
+
+    const handleUpdate = (snapshot) => {
+      if (finished) return;
+      setJob(snapshot);
+
+      if (snapshot.state === "done") {
+        finished = true;
+        localStorage.removeItem("currentJob");
+        localStorage.setItem("censorshipReport", JSON.stringify(snapshot.result));
+        if (snapshot.kind === "censor") {
+          console.log("✅ Censorship complete. Redirecting to /download");
+          navigate("/download");
+        } else if (!snapshot.result.contains_offensive_words) {
+          console.log("✅ No offensive words detected. Back to the Upload Page.");
+          navigate("/", { state: { uploadMessage: "✅ No offensive words detected! You can upload another video." } });
+        } else {
+          console.log("✅ Processing complete. Redirecting to report page.");
+          navigate("/report");
+        }
+      } else if (snapshot.state === "error") {
+        finished = true;
+        localStorage.removeItem("currentJob");
+        alert(`❌ Processing failed: ${snapshot.error}`);
+        navigate(snapshot.kind === "censor" ? "/report" : "/");
       }
-    }, 5000);  // ✅ Check every 5 seconds
+    };
+
+    //  Fall back to polling the job if the event stream drops
+    const startPolling = () => {
+      if (poll || finished) return;
+      poll = setInterval(async () => {
+        try {
+          const response = await fetch(`${API_URL}/jobs/${currentJob.job_id}`);
+          if (response.ok) handleUpdate(await response.json());
+        } catch (error) {
+          console.log("⏳ Still processing...");
+        }
+      }, 2000);
+    };
 
-    return () => clearInterval(checkProcessing);
+    events = new EventSource(`${API_URL}/jobs/${currentJob.job_id}/events`);
+    events.onmessage = (e) => handleUpdate(JSON.parse(e.data));
+    events.onerror = () => {
+      events.close();
+      startPolling();
+    };
+
+    return () => {
+      finished = true;
+      if (events) events.close();
+      if (poll) clearInterval(poll);
+    };
   }, [navigate]);
 
+  const percent = Math.round((job?.progress || 0) * 100);
+
   return (
     <div className="container mt-5 text-center">
       <div className="card p-4 shadow">
         <h1 className="h4">Processing Your Video...</h1>
         <div className="spinner-border text-primary my-3" role="status"></div>
-        <p>Please wait while we analyze and censor your video.</p>
+
+        <div className="progress my-3">
+          <div
+            className="progress-bar"
+            role="progressbar"
+            style={{ width: `${percent}%` }}
+            aria-valuenow={percent}
+            aria-valuemin="0"
+            aria-valuemax="100"
+          >
+            {percent}%
+          </div>
+        </div>
+
+        {job && job.state === "queued" && <p>Waiting for a free worker...</p>}
+
+        {job && (
+          <ul className="list-unstyled text-start mx-auto" style={{ maxWidth: "320px" }}>
+            {job.stages.map((stage) => (
+              <li key={stage.name}>
+                {stage.state === "done" ? "✅" : stage.state === "running" ? "⏳" : "▫️"}{" "}
+                {STAGE_LABELS[stage.name] || stage.name}
+                {stage.seconds !== null && ` (${stage.seconds}s)`}
+              </li>
+            ))}
+          </ul>
+        )}
+
+        {!job && <p>Please wait while we analyze and censor your video.</p>}
       </div>
     </div>
   );
@@ -1,10 +1,12 @@
 import React, { useState } from "react";
-import { useNavigate } from "react-router-dom";
+import { useLocation, useNavigate } from "react-router-dom";
 
 const UploadPage = () => {
   const [selectedFile, setSelectedFile] = useState(null);
   const [isUploading, setIsUploading] = useState(false);
-  const [uploadMessage, setUploadMessage] = useState("");
+  const location = useLocation();
+  //  Set by the loading page when a finished upload had nothing to censor
+  const [uploadMessage, setUploadMessage] = useState(location.state?.uploadMessage || "");
   const navigate = useNavigate();
 
   const handleUpload = async () => {
@@ -18,6 +20,7 @@ const UploadPage = () => {
     console.log("🔹 Uploading started...");
 
     localStorage.removeItem("censorshipReport");
+    localStorage.removeItem("currentJob");
 
     const formData = new FormData();
     formData.append("file", selectedFile);
@@ -33,17 +36,11 @@ const UploadPage = () => {
       }
 
       const data = await response.json();
-      console.log(" Upload complete, received response:", data);
+      console.log(" Upload complete, processing as job:", data.job_id);
 
-      localStorage.setItem("censorshipReport", JSON.stringify(data));
-
-      if (data.contains_offensive_words) {
-        console.log("🚀 Offensive words detected, navigating to /report");
-        navigate("/report");
-      } else {
-        console.log("✅ No offensive words detected. Staying on Upload Page.");
-        setUploadMessage("✅ No offensive words detected! You can upload another video.");
-      }
+      //  Transcription and detection run as a background job; the loading page follows it
+      localStorage.setItem("currentJob", JSON.stringify({ job_id: data.job_id, kind: "upload" }));
+      navigate("/loading");
     } catch (error) {
       console.error(" Upload failed", error);
       alert(" Upload failed. Please try again.");